@@ -1,12 +1,20 @@
-from transformers import pipeline
+import os
 from core.utils.logger import get_logger
+from core.utils import models, inference_cache, backends
 
 log = get_logger("analyzer")
 
-_sent = pipeline(
-    "sentiment-analysis",
-    model="cardiffnlp/twitter-roberta-base-sentiment"
-)
+MODEL_NAME = "cardiffnlp/twitter-roberta-base-sentiment"
+MODEL_REVISION = os.getenv("ANALYZER_MODEL_REVISION", "main")
+
+def _load():
+    return backends.load_pipeline("sentiment-analysis", MODEL_NAME, MODEL_REVISION)
+
+# Loaded on first use, not at import
+models.register("sentiment", _load)
+
+def _sent():
+    return models.get("sentiment")
 
 # ✅ ADD THIS LABEL MAP
 LABEL_MAP = {
@@ -15,31 +23,95 @@ LABEL_MAP = {
     "LABEL_2": "positive"
 }
 
-def analyze_bias(text: str):
-    if not text:
-        return {"bias_label": "unknown", "bias_score": 0.0}
+MAX_CHARS = 512          # same character truncation the single-text path always used
+DEFAULT_BATCH_SIZE = 16
+
+UNKNOWN = {"bias_label": "unknown", "bias_score": 0.0}
+
+# Cached raw model outputs are only valid for this model + backend + truncation
+CACHE_NS = inference_cache.namespace(MODEL_NAME, MODEL_REVISION, backend=backends.BACKEND,
+                                     max_chars=MAX_CHARS, max_length=512)
+MODEL_VERSION = inference_cache.version(CACHE_NS)   # + pipeline.SCORE_VERSION = analysis.model_version
+
+def _to_bias(r):
+    """Turn one raw pipeline result into our bias dict"""
+    raw_label = r["label"]          # LABEL_0 / LABEL_1 / LABEL_2
+    score = float(r["score"])
+
+    bias_label = LABEL_MAP.get(raw_label, "unknown")
 
+    # ✅ Bias score logic
+    if bias_label == "negative":
+        bias_score = -score
+    elif bias_label == "positive":
+        bias_score = score
+    else:
+        bias_score = 0.0
+
+    return {
+        "bias_label": bias_label,
+        "bias_score": round(bias_score, 3)
+    }
+
+def _token_lengths(texts):
+    """Token count per text, used only to bucket similar lengths together"""
     try:
-        r = _sent(text[:512])[0]
+        enc = _sent().tokenizer(texts, truncation=True, max_length=512)
+        return [len(ids) for ids in enc["input_ids"]]
+    except Exception:
+        return [len(t) for t in texts]  # char length is a good enough proxy
+
+def analyze_bias_batch(texts, batch_size: int = DEFAULT_BATCH_SIZE):
+    """Analyze many texts at once. Returns one result per input, in input order."""
+    out = [dict(UNKNOWN) for _ in texts]
+
+    # Empty texts never reach the model
+    idx = [i for i, t in enumerate(texts) if t]
+    if not idx:
+        return out
 
-        raw_label = r["label"]          # LABEL_0 / LABEL_1 / LABEL_2
-        score = float(r["score"])
+    # Same content seen before (any URL, any run) -> reuse the stored model output
+    cache = inference_cache.get_cache()
+    if cache is not None:
+        cached = cache.get_many(CACHE_NS, [texts[i] for i in idx])
+        for i, r in zip(idx, cached):
+            if r is not None:
+                out[i] = _to_bias(r)
+        idx = [i for i, r in zip(idx, cached) if r is None]
+        if not idx:
+            return out
 
-        bias_label = LABEL_MAP.get(raw_label, "unknown")
+    clipped = [texts[i][:MAX_CHARS] for i in idx]
+    lengths = _token_lengths(clipped)
 
-        # ✅ Bias score logic
-        if bias_label == "negative":
-            bias_score = -score
-        elif bias_label == "positive":
-            bias_score = score
-        else:
-            bias_score = 0.0
+    # Sort by length so each bucket pads to roughly the same size
+    order = sorted(range(len(idx)), key=lambda k: lengths[k])
 
-        return {
-            "bias_label": bias_label,
-            "bias_score": round(bias_score, 3)
-        }
+    sent = _sent()
+    for start in range(0, len(order), batch_size):
+        bucket = order[start:start + batch_size]
+        try:
+            results = sent([clipped[k] for k in bucket], batch_size=len(bucket),
+                           truncation=True, max_length=512)
+        except Exception as e:
+            log.warning(f"Analyzer batch of {len(bucket)} failed, retrying one by one: {e}")
+            results = []
+            for k in bucket:
+                try:
+                    results.append(sent(clipped[k], truncation=True, max_length=512)[0])
+                except Exception as e:
+                    log.error(f"Analyzer failed: {e}")
+                    results.append(None)
 
-    except Exception as e:
-        log.error(f"Analyzer failed: {e}")
-        return {"bias_label": "unknown", "bias_score": 0.0}
+        # Texts that failed on their own keep UNKNOWN and are not cached
+        done = [(idx[k], r) for k, r in zip(bucket, results) if r is not None]
+        for i, r in done:
+            out[i] = _to_bias(r)
+        if cache is not None and done:
+            cache.put_many(CACHE_NS, [texts[i] for i, _ in done],
+                           [{"label": r["label"], "score": float(r["score"])} for _, r in done])
+
+    return out
+
+def analyze_bias(text: str):
+    return analyze_bias_batch([text], batch_size=1)[0]
@@ -3,11 +3,14 @@ Fetches news via NewsData.io, validates sources, fills missing text via Firecraw
 Supports pagination and safely respects API rate limits.
 """
 
-import os, time, requests
+import os, queue, threading, requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from requests.adapters import HTTPAdapter
 from tenacity import retry, stop_after_attempt, wait_exponential
-from core.utils.source_filter import is_source_allowed, reliability_tag
+from core.utils.source_filter import is_source_allowed, reliability_tag, check_safe_browsing_batch
 from core.utils.logger import get_logger
+from core.utils import ratelimit, metrics
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -16,15 +19,42 @@ log = get_logger("crawler")
 NEWSDATA_API_KEY = os.getenv("NEWSDATA_API_KEY")
 FIRECRAWL_API_KEY = os.getenv("FIRECRAWL_API_KEY")
 
+NEWSDATA_URL = os.getenv("NEWSDATA_URL", "https://newsdata.io/api/1/news")
+FIRECRAWL_URL = os.getenv("FIRECRAWL_URL", "https://api.firecrawl.dev/v1/extract")
+
+# Request rates per API host (token buckets) and Firecrawl parallelism
+NEWSDATA_RPS = float(os.getenv("NEWSDATA_RPS", "0.66"))     # ~ the old fixed 1.5s between pages
+FIRECRAWL_RPS = float(os.getenv("FIRECRAWL_RPS", "5"))
+FIRECRAWL_BURST = float(os.getenv("FIRECRAWL_BURST", "5"))
+FIRECRAWL_CONCURRENCY = int(os.getenv("FIRECRAWL_CONCURRENCY", "8"))
+
+# One keep-alive session for all API calls; pool sized for the extraction threads
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=FIRECRAWL_CONCURRENCY))
+_session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=FIRECRAWL_CONCURRENCY))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _extract_pool():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=FIRECRAWL_CONCURRENCY, thread_name_prefix="firecrawl")
+        return _executor
+
 # -----------------------------------------------
 # Internal helper for API requests
 # -----------------------------------------------
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=10))
+@retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=10),
+       before_sleep=metrics.retry_hook("newsdata"))
 def _newsdata_request(params):
-    print("Requesting NewsData.io with params:", params)
-    resp = requests.get("https://newsdata.io/api/1/news", params=params, timeout=20)
-    print("Status code:", resp.status_code)
-    print("Response text:", resp.text[:500])
+    ratelimit.for_host(NEWSDATA_URL, NEWSDATA_RPS).acquire()
+    log.debug(f"Requesting NewsData.io: q={params.get('q')!r} page={params.get('page')}", extra={"stage": "newsdata"})
+    with metrics.timer(stage="crawl"):
+        resp = _session.get(NEWSDATA_URL, params=params, timeout=20)
+    log.debug(f"NewsData responded {resp.status_code} ({len(resp.content)} bytes)", extra={"stage": "newsdata"})
+    metrics.inc("http_requests_total", api="newsdata", status=resp.status_code)
     resp.raise_for_status()
     return resp.json()
 
@@ -35,93 +65,235 @@ def extract_text_firecrawl(url: str) -> str:
     if not url:
         return ""
     try:
-        r = requests.post(
-            "https://api.firecrawl.dev/v1/extract",
-            headers={"Authorization": f"Bearer {FIRECRAWL_API_KEY}"},
-            json={"url": url},
-            timeout=30
-        )
+        ratelimit.for_host(FIRECRAWL_URL, FIRECRAWL_RPS, FIRECRAWL_BURST).acquire()
+        with metrics.timer(stage="firecrawl"):
+            r = _session.post(
+                FIRECRAWL_URL,
+                headers={"Authorization": f"Bearer {FIRECRAWL_API_KEY}"},
+                json={"url": url},
+                timeout=30
+            )
+        metrics.inc("http_requests_total", api="firecrawl", status=r.status_code)
+        log.debug(f"Firecrawl {r.status_code} for {url}", extra={"stage": "firecrawl"})
         return r.json().get("text", "") if r.ok else ""
     except Exception as e:
         log.warning(f"Firecrawl failed: {e}")
+        metrics.inc("errors_total", stage="firecrawl")
         return ""
 
+def extract_many(urls) -> list:
+    """Firecrawl several URLs in parallel (bounded + rate limited). Same order as urls."""
+    urls = list(urls)
+    if len(urls) <= 1:
+        return [extract_text_firecrawl(u) for u in urls]
+    return list(_extract_pool().map(extract_text_firecrawl, urls))
+
+_END = object()
+
+def _article_url(a) -> str:
+    return a.get("source_url") or a.get("link") or ""
+
 # -----------------------------------------------
-# Fetch paginated news results
+# Crawl stages: pages -> screened articles -> text filled in
 # -----------------------------------------------
-def fetch_news(topic: str = "latest", limit: int = 20, countries: str = "us,in,gb"):
-    if not NEWSDATA_API_KEY:
-        log.error("NEWSDATA_API_KEY missing")
-        return []
-
+def iter_pages(topic: str = "latest", countries: str = "us,in,gb", watermark=None, should_stop=None):
+    """
+    Yield (results, next_page_token) for each NewsData page, following nextPage tokens.
+    With a Watermark, paging starts from its saved token (resume mode) and stops
+    after the first page that reaches already-ingested content. `should_stop()` is
+    checked before every request, so a consumer that has enough never pays for another page.
+    """
     params = {
         "apikey": NEWSDATA_API_KEY,
         "q": topic,
         "language": "en",
         "country": countries
     }
+    next_page = watermark.start_page if watermark else None
+    if next_page:
+        log.info(f"Resuming '{topic}' from saved page token")  # backfill, or the gap left by a cut-short pass
+
+    while True:
+        if should_stop and should_stop():
+            return
+        if next_page:
+            params["page"] = next_page  # use token, not numeric page
+        data = _newsdata_request(params)
+
+        if data.get("status") != "success":
+            log.error(f"NewsData returned error: {data}")
+            return
+
+        results = data.get("results") or []
+        if not results:
+            return
+        next_page = data.get("nextPage")
+        if watermark:
+            watermark.observe(results)
+        yield results, next_page
+
+        if not next_page:
+            return  # no more pages
+        if watermark and watermark.reached(results):
+            log.info(f"Reached the '{topic}' watermark, stopping pagination")
+            return
+        # Pacing between pages is handled by the NewsData token bucket
+
+def screen_results(results, url_index=None, limit: int = None):
+    """
+    Turn one page of raw results into article dicts. Known URLs are dropped
+    first (one lookup per page), then Safe Browsing runs once for the page.
+    Content may still be empty; see fill_missing_content().
+    Returns (articles, skipped_as_known).
+    """
+    skipped = 0
+
+    # One lookup for the whole page; known articles never reach the checks below
+    if url_index is not None:
+        known = url_index.known(_article_url(a) for a in results)
+        if known:
+            skipped = sum(1 for a in results if _article_url(a) in known)
+            results = [a for a in results if _article_url(a) not in known]
+
+    # Safe Browsing verdicts for the whole page in one (cached) request
+    verdicts = check_safe_browsing_batch(_article_url(a) for a in results)
 
     out = []
-    next_page = None
+    for a in results:
+        if limit is not None and len(out) >= limit:
+            break
+        url = _article_url(a)
+        if url_index is not None and not url_index.claim(url):
+            metrics.inc("duplicates_skipped_total", where="run")
+            continue  # repeated within this run
+        safe = verdicts.get(url, True)
+        if not is_source_allowed(url, safe=safe):
+            continue
 
-    try:
-        while len(out) < limit:
-            if next_page:
-                params["page"] = next_page  # use token, not numeric page
-            data = _newsdata_request(params)
+        tag = reliability_tag(url, safe=safe)
+        title = a.get("title") or "Untitled"
+        summary = a.get("description") or ""
+        content = a.get("content") or summary
 
-            if data.get("status") != "success":
-                log.error(f"NewsData returned error: {data}")
-                break
+        published = a.get("pubDate")
+        try:
+            published = datetime.fromisoformat(published.replace("Z", "+00:00")) if published else datetime.now(timezone.utc)
+        except Exception:
+            published = datetime.now(timezone.utc)
 
-            results = data.get("results") or []
-            if not results:
-                break
+        out.append({
+            "title": title,
+            "url": url,
+            "source_domain": url.split("/")[2] if "://" in url else url,
+            "summary": summary,
+            "content": content,
+            "published_at": published.isoformat(),
+            "reliability_tag": tag,
+            "is_verified": True if tag == "trusted" else None
+        })
 
-            for a in results:
-                url = a.get("source_url") or a.get("link") or ""
-                if not is_source_allowed(url):
-                    continue
-
-                tag = reliability_tag(url)
-                title = a.get("title") or "Untitled"
-                summary = a.get("description") or ""
-                content = a.get("content") or summary
-                if not content:
-                    content = extract_text_firecrawl(url)
-
-                published = a.get("pubDate")
-                try:
-                    published = datetime.fromisoformat(published.replace("Z", "+00:00")) if published else datetime.now(timezone.utc)
-                except Exception:
-                    published = datetime.now(timezone.utc)
-
-                out.append({
-                    "title": title,
-                    "url": url,
-                    "source_domain": url.split("/")[2] if "://" in url else url,
-                    "summary": summary,
-                    "content": content,
-                    "published_at": published.isoformat(),
-                    "reliability_tag": tag,
-                    "is_verified": True if tag == "trusted" else None
-                })
-
-                if len(out) >= limit:
-                    break
+    metrics.inc("duplicates_skipped_total", skipped, where="stored")
+    metrics.inc("articles_screened_total", len(out))
+    return out, skipped
 
-            next_page = data.get("nextPage")
-            if not next_page:
-                break  # no more pages
+def fill_missing_content(articles):
+    """Firecrawl every article that has no text yet, in parallel"""
+    missing = [art for art in articles if not art["content"]]
+    for art, text in zip(missing, extract_many(art["url"] for art in missing)):
+        art["content"] = text
+    return articles
+
+# -----------------------------------------------
+# Fetch paginated news results
+# -----------------------------------------------
+def iter_news_pages(topic: str = "latest", limit: int = 20, countries: str = "us,in,gb",
+                    url_index=None, prefetch: int = 1, watermark=None):
+    """
+    Yield ready-to-process article lists, one per NewsData page. A background
+    thread downloads/screens/extracts up to `prefetch` pages ahead while the
+    caller works on the current one, so memory stays at a few pages no matter
+    how large `limit` is. If a page fails, pages already yielded are kept and
+    iteration simply ends.
+    With a Watermark, each page is checkpointed once the caller is done with
+    it, and the watermark advances when a clean pass reached it (see Watermark.finish).
+    """
+    if not NEWSDATA_API_KEY:
+        log.error("NEWSDATA_API_KEY missing")
+        return
 
-            time.sleep(1.5)  # avoid rate-limit issues
+    q = queue.Queue(maxsize=max(1, prefetch))
+    stop = threading.Event()
+    stats = {"fetched": 0, "skipped": 0}
 
-    except Exception as e:
-        log.error(f"NewsData error: {e}")
-        return []
+    def _put(item):
+        # Give up quietly if the consumer went away
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce():
+        page = watermark.start_page if watermark else None  # token this page was requested with
+        try:
+            for results, next_page in iter_pages(topic, countries, watermark):
+                if stop.is_set():
+                    break
+                arts, n = screen_results(results, url_index, limit=limit - stats["fetched"])
+                stats["skipped"] += n
+                stats["fetched"] += len(arts)
+                cut = stats["fetched"] >= limit
+                if not _put((fill_missing_content(arts), next_page, page, cut)):
+                    break
+                if cut:
+                    if watermark:
+                        watermark.stopped_at(page)  # may be cut mid-page; re-read it, known URLs drop out
+                    break
+                page = next_page
+        except Exception as e:
+            _put(e)
+        finally:
+            _put(_END)
+
+    t = threading.Thread(target=_produce, name=f"newsdata-{topic}", daemon=True)
+    t.start()
+    ok, next_page, cut = False, None, False
+    try:
+        while True:
+            item = q.get()
+            if item is _END:
+                ok = True
+                break
+            if isinstance(item, Exception):
+                log.error(f"NewsData error: {item}")
+                break
+            arts, next_page, page, cut = item
+            if arts:
+                yield arts
+            if watermark:
+                # Caller has finished with this page; a page the limit cut short is read again next time
+                watermark.checkpoint(page if cut else next_page)
+        if ok and watermark:
+            watermark.finish(exhausted=not next_page and not cut)
+    finally:
+        stop.set()
+        log.info(f"Fetched {stats['fetched']} articles for topic='{topic}' (skipped {stats['skipped']} already ingested)")
+
+def iter_news(topic: str = "latest", limit: int = 20, countries: str = "us,in,gb", url_index=None,
+              prefetch: int = 1, watermark=None):
+    """Like iter_news_pages(), one article at a time"""
+    for page in iter_news_pages(topic, limit, countries, url_index, prefetch, watermark):
+        yield from page
 
-    log.info(f"Fetched {len(out)} articles for topic='{topic}'")
-    return out
+def fetch_news(topic: str = "latest", limit: int = 20, countries: str = "us,in,gb", url_index=None,
+               watermark=None):
+    """
+    Fetch up to `limit` articles. If a UrlIndex is given, URLs we already have
+    are dropped before any Safe Browsing / Firecrawl work and don't count toward limit.
+    """
+    return list(iter_news(topic, limit, countries, url_index, watermark=watermark))
 
 # -----------------------------------------------
 # Standalone test
@@ -1,62 +1,180 @@
-from transformers import pipeline
 from core.utils.logger import get_logger
+from core.utils import models, inference_cache, backends
 import os
 os.environ["TRANSFORMERS_NO_TF_WARNING"] = "1"
 os.environ["USE_TF"] = "0"
 
 log = get_logger("summarizer")
 
-# Load the summarization pipeline once
-_summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
+MODEL_NAME = "facebook/bart-large-cnn"
+MODEL_REVISION = os.getenv("SUMMARIZER_MODEL_REVISION", "main")
 
-def summarize(article_text: str, reliability_hint: str):
-    if not article_text:
-        return {
-            "neutral_summary": "",
-            "trust_index": 50,
-            "reasoning": "No content provided"
-        }
+def _load():
+    return backends.load_pipeline("summarization", MODEL_NAME, MODEL_REVISION)
 
-    try:
-        # Ask the model for both summary and reasoning
-        prompt = (
-            "Write your response in the following format:\n"
-            "Summary: <your 3-4 sentence factual summary>\n"
-            "Reasoning: <brief explanation of why the content seems trustworthy or questionable>\n\n"
-            f"Article:\n{article_text[:2000]}"
-        )
-
-        output = _summarizer(prompt, max_length=100, min_length=50, do_sample=False)[0]["summary_text"]
-
-        # Split summary and reasoning if possible
-        if "Reasoning:" in output:
-            summary, reasoning = output.split("Reasoning:", 1)
-        elif "Explanation:" in output:
-            summary, reasoning = output.split("Explanation:", 1)
-        else:
-            summary, reasoning = output, "Model did not provide explicit reasoning."
+# Loaded on first use and then kept for the whole process
+models.register("summarizer", _load)
+
+def _summarizer():
+    return models.get("summarizer")
+
+MAX_CHARS = 2000
+MAX_INPUT_TOKENS = 1024     # BART's positional limit
+GEN_KWARGS = {"max_length": 100, "min_length": 50, "do_sample": False}
+
+# Rough padded-token budget for one generate() call; batch size is derived from it
+TOKEN_BUDGET = int(os.getenv("SUMMARIZER_TOKEN_BUDGET", "8192"))
+MAX_BATCH_SIZE = int(os.getenv("SUMMARIZER_MAX_BATCH", "16"))
+
+# Cached generations are only valid for this model + backend + prompt truncation + generation settings
+CACHE_NS = inference_cache.namespace(MODEL_NAME, MODEL_REVISION, backend=backends.BACKEND, max_chars=MAX_CHARS,
+                                     max_input_tokens=MAX_INPUT_TOKENS, **GEN_KWARGS)
+MODEL_VERSION = inference_cache.version(CACHE_NS)   # stored as summaries.model_version
+
+EMPTY = {
+    "neutral_summary": "",
+    "trust_index": 50,
+    "reasoning": "No content provided"
+}
+
+FAILED = {
+    "neutral_summary": "",
+    "trust_index": 50,
+    "reasoning": "Error in summarizer"
+}
+
+def _prompt(article_text: str) -> str:
+    # Ask the model for both summary and reasoning
+    return (
+        "Write your response in the following format:\n"
+        "Summary: <your 3-4 sentence factual summary>\n"
+        "Reasoning: <brief explanation of why the content seems trustworthy or questionable>\n\n"
+        f"Article:\n{article_text[:MAX_CHARS]}"
+    )
+
+def _trust_index(reliability_hint: str) -> int:
+    # Simple heuristic for trust index
+    trust_index = 60
+    if reliability_hint == "trusted":
+        trust_index += 20
+    elif reliability_hint == "bad":
+        trust_index -= 20
+    return max(0, min(100, trust_index))
+
+def for_source(summary: dict, reliability_hint: str) -> dict:
+    """Another article's summary (e.g. a near-duplicate's), re-scored for this article's source"""
+    return {**summary, "trust_index": _trust_index(reliability_hint)}
+
+def _to_result(output: str, reliability_hint: str):
+    # Split summary and reasoning if possible
+    if "Reasoning:" in output:
+        summary, reasoning = output.split("Reasoning:", 1)
+    elif "Explanation:" in output:
+        summary, reasoning = output.split("Explanation:", 1)
+    else:
+        summary, reasoning = output, "Model did not provide explicit reasoning."
 
-        summary = summary.strip()
-        reasoning = reasoning.strip()
+    return {
+        "neutral_summary": summary.strip(),
+        "trust_index": _trust_index(reliability_hint),
+        "reasoning": reasoning.strip()
+    }
 
-        # Simple heuristic for trust index
-        trust_index = 60
-        if reliability_hint == "trusted":
-            trust_index += 20
-        elif reliability_hint == "bad":
-            trust_index -= 20
-        trust_index = max(0, min(100, trust_index))
+def _generate(encoded):
+    """Run generate() on a list of already-tokenized inputs and decode the outputs"""
+    summarizer = _summarizer()
+    tok, model = summarizer.tokenizer, summarizer.model
+    batch = tok.pad({"input_ids": encoded}, return_tensors="pt").to(model.device)
+    ids = model.generate(**batch, **GEN_KWARGS)
+    return tok.batch_decode(ids, skip_special_tokens=True, clean_up_tokenization_spaces=True)
 
-        return {
-            "neutral_summary": summary,
-            "trust_index": trust_index,
-            "reasoning": reasoning
-        }
+def _buckets(order, lengths):
+    """Group length-sorted indices so that batch_size * longest stays within TOKEN_BUDGET"""
+    batch = []
+    for i in order:
+        # Sorted ascending, so the item being added is always the longest in the batch
+        if batch and ((len(batch) + 1) * lengths[i] > TOKEN_BUDGET or len(batch) >= MAX_BATCH_SIZE):
+            yield batch
+            batch = []
+        batch.append(i)
+    if batch:
+        yield batch
 
+def summarize_batch(articles):
+    """
+    Summarize many articles at once. Each item is a dict with "content" and
+    "reliability_tag" (the article dicts from the crawler work as-is).
+    Returns one result per input, in input order.
+    """
+    out = [None] * len(articles)
+
+    idx = []
+    for i, a in enumerate(articles):
+        if a.get("content"):
+            idx.append(i)
+        else:
+            out[i] = dict(EMPTY)
+    if not idx:
+        return out
+
+    # Same content seen before (any URL, any run) -> reuse the generated text
+    cache = inference_cache.get_cache()
+    if cache is not None:
+        cached = cache.get_many(CACHE_NS, [articles[i]["content"] for i in idx])
+        for i, text in zip(idx, cached):
+            if text is not None:
+                out[i] = _to_result(text, articles[i].get("reliability_tag"))
+        idx = [i for i, text in zip(idx, cached) if text is None]
+        if not idx:
+            return out
+
+    # Tokenize everything once; batches are padded from these ids directly
+    tok = _summarizer().tokenizer
+    prompts = [_prompt(articles[i]["content"]) for i in idx]
+    try:
+        encoded = tok(prompts, truncation=True, max_length=MAX_INPUT_TOKENS)["input_ids"]
     except Exception as e:
-        log.error(f"Summarization failed: {e}")
-        return {
-            "neutral_summary": "",
-            "trust_index": 50,
-            "reasoning": "Error in summarizer"
-        }
+        log.warning(f"Batch tokenization failed, retrying one by one: {e}")
+        encoded = []
+        for i, p in zip(idx, prompts):
+            try:
+                encoded.append(tok(p, truncation=True, max_length=MAX_INPUT_TOKENS)["input_ids"])
+            except Exception as e:
+                log.error(f"Summarization failed while tokenizing: {e}")
+                out[i] = dict(FAILED)
+                encoded.append(None)
+        keep = [k for k, ids in enumerate(encoded) if ids is not None]
+        idx = [idx[k] for k in keep]
+        encoded = [encoded[k] for k in keep]
+
+    lengths = [len(ids) for ids in encoded]
+    order = sorted(range(len(idx)), key=lambda k: lengths[k])
+
+    for bucket in _buckets(order, lengths):
+        try:
+            texts = _generate([encoded[k] for k in bucket])
+        except Exception as e:
+            log.warning(f"Summarization batch of {len(bucket)} failed, retrying one by one: {e}")
+            texts = []
+            for k in bucket:
+                try:
+                    texts.append(_generate([encoded[k]])[0])
+                except Exception as e:
+                    log.error(f"Summarization failed: {e}")
+                    texts.append(None)
+
+        for k, text in zip(bucket, texts):
+            i = idx[k]
+            if text is None:
+                out[i] = dict(FAILED)
+            else:
+                out[i] = _to_result(text, articles[i].get("reliability_tag"))
+
+        if cache is not None:
+            done = [(idx[k], text) for k, text in zip(bucket, texts) if text is not None]
+            cache.put_many(CACHE_NS, [articles[i]["content"] for i, _ in done], [text for _, text in done])
+
+    return out
+
+def summarize(article_text: str, reliability_hint: str):
+    return summarize_batch([{"content": article_text, "reliability_tag": reliability_hint}])[0]
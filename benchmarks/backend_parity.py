@@ -0,0 +1,112 @@
+"""
+Parity check for the inference backends.
+Runs the same texts through torch-fp32 (the reference) and each candidate
+backend, then reports analyzer label agreement / score drift, summary
+similarity against fp32, and throughput, so speed can be traded against
+accuracy with data.
+
+    python -m benchmarks.backend_parity --texts sample.json --backends torch-int8 onnxruntime
+    python -m benchmarks.backend_parity --from-db 200
+
+`--texts` takes a JSON list of strings or of article dicts with "content".
+"""
+
+import os
+os.environ["INFERENCE_CACHE"] = "0"  # always measure the model, never the cache
+
+import argparse, difflib, json, pathlib, time
+from core.utils import models, backends
+from agents import analyzer_agent, summarizer_agent
+
+def _load_texts(args):
+    if args.texts:
+        data = json.loads(pathlib.Path(args.texts).read_text(encoding="utf-8"))
+        texts = [d if isinstance(d, str) else (d.get("content") or d.get("summary") or "") for d in data]
+    else:
+        from core.utils.db_connect import exec_one
+        rows = exec_one("SELECT content FROM articles WHERE content <> '' ORDER BY id DESC LIMIT %s", (args.from_db,))
+        texts = [r["content"] for r in rows or []]
+    return [t for t in texts if t][:args.limit]
+
+def _use(backend: str):
+    """Point both registry entries at `backend` (the next get() loads it)"""
+    models.register("sentiment", lambda: backends.load_pipeline(
+        "sentiment-analysis", analyzer_agent.MODEL_NAME, analyzer_agent.MODEL_REVISION, backend))
+    models.register("summarizer", lambda: backends.load_pipeline(
+        "summarization", summarizer_agent.MODEL_NAME, summarizer_agent.MODEL_REVISION, backend))
+    models.warm("sentiment", "summarizer")
+
+def _run(backend: str, texts, skip_summaries: bool):
+    _use(backend)
+    t0 = time.perf_counter()
+    bias = analyzer_agent.analyze_bias_batch(texts)
+    t_an = time.perf_counter() - t0
+
+    sums, t_sum = None, 0.0
+    if not skip_summaries:
+        t0 = time.perf_counter()
+        sums = summarizer_agent.summarize_batch([{"content": t, "reliability_tag": "unverified"} for t in texts])
+        t_sum = time.perf_counter() - t0
+    return {"bias": bias, "summaries": sums, "analyze_s": t_an, "summarize_s": t_sum}
+
+def _token_f1(a: str, b: str) -> float:
+    """Unigram overlap F1 (ROUGE-1 style)"""
+    ta, tb = a.lower().split(), b.lower().split()
+    if not ta or not tb:
+        return float(ta == tb)
+    common = sum(min(ta.count(w), tb.count(w)) for w in set(ta))
+    if not common:
+        return 0.0
+    p, r = common / len(ta), common / len(tb)
+    return 2 * p * r / (p + r)
+
+def compare(ref, cand, n):
+    rep = {
+        "label_agreement": sum(a["bias_label"] == b["bias_label"] for a, b in zip(ref["bias"], cand["bias"])) / n,
+        "mean_abs_score_diff": sum(abs(a["bias_score"] - b["bias_score"]) for a, b in zip(ref["bias"], cand["bias"])) / n,
+        "analyze_speedup": ref["analyze_s"] / cand["analyze_s"] if cand["analyze_s"] else None,
+    }
+    if ref["summaries"] is not None:
+        pairs = [(a["neutral_summary"], b["neutral_summary"]) for a, b in zip(ref["summaries"], cand["summaries"])]
+        rep["summary_exact_match"] = sum(a == b for a, b in pairs) / n
+        rep["summary_seq_ratio"] = sum(difflib.SequenceMatcher(None, a, b).ratio() for a, b in pairs) / n
+        rep["summary_token_f1"] = sum(_token_f1(a, b) for a, b in pairs) / n
+        rep["summarize_speedup"] = ref["summarize_s"] / cand["summarize_s"] if cand["summarize_s"] else None
+    return rep
+
+def main():
+    p = argparse.ArgumentParser()
+    src = p.add_mutually_exclusive_group(required=True)
+    src.add_argument("--texts", help="JSON file with texts or article dicts")
+    src.add_argument("--from-db", type=int, help="Use the N most recent stored articles")
+    p.add_argument("--limit", type=int, default=200)
+    p.add_argument("--backends", nargs="+", default=["torch-int8", "onnxruntime"], choices=backends.BACKENDS)
+    p.add_argument("--skip-summaries", action="store_true", help="Only compare the analyzer (much faster)")
+    p.add_argument("--json", help="Also write the report to this file")
+    args = p.parse_args()
+
+    texts = _load_texts(args)
+    if not texts:
+        raise SystemExit("No texts to compare")
+    n = len(texts)
+
+    ref = _run("torch-fp32", texts, args.skip_summaries)
+    report = {"n": n, "torch-fp32": {"analyze_s": ref["analyze_s"], "summarize_s": ref["summarize_s"]}}
+    for b in args.backends:
+        if b == "torch-fp32":
+            continue
+        try:
+            cand = _run(b, texts, args.skip_summaries)
+        except Exception as e:
+            report[b] = {"error": str(e)}
+            continue
+        report[b] = {"analyze_s": cand["analyze_s"], "summarize_s": cand["summarize_s"], **compare(ref, cand, n)}
+        models.unload("sentiment")
+        models.unload("summarizer")
+
+    print(json.dumps(report, indent=2))
+    if args.json:
+        pathlib.Path(args.json).write_text(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Import-time benchmark.
+Measures, in a fresh interpreter each time, how long it takes to import the
+pipeline / crawler / dashboard-facing modules, their peak RSS, and whether
+torch or transformers got pulled in. The "warm" case additionally loads both
+models, which is what every import used to cost before the lazy registry.
+
+    python -m benchmarks.import_time --repeat 3
+"""
+
+import argparse, json, os, pathlib, subprocess, sys
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+CASES = {
+    "core.pipeline": "import core.pipeline",
+    "agents.crawler_agent": "import agents.crawler_agent",
+    "agents (both)": "import agents.summarizer_agent, agents.analyzer_agent",
+    "core.pipeline + warm models": (
+        "import core.pipeline\n"
+        "from core.utils import models\n"
+        "models.warm()"
+    ),
+}
+
+PROBE = """
+import json, resource, sys, time
+t0 = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - t0
+print(json.dumps({{
+    "seconds": elapsed,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "torch_loaded": "torch" in sys.modules,
+    "transformers_loaded": "transformers" in sys.modules,
+}}))
+"""
+
+def measure(code: str) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE.format(code=code)],
+        cwd=ROOT, capture_output=True, text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if proc.returncode != 0:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr else "failed"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--repeat", type=int, default=3, help="Runs per case (best time is reported)")
+    p.add_argument("--skip-warm", action="store_true", help="Skip the case that loads the models")
+    p.add_argument("--json", help="Also write results to this file")
+    args = p.parse_args()
+
+    results = {}
+    for name, code in CASES.items():
+        if args.skip_warm and "warm" in name:
+            continue
+        runs = [measure(code) for _ in range(args.repeat)]
+        ok = [r for r in runs if "error" not in r]
+        if not ok:
+            results[name] = runs[0]
+            print(f"{name:32s} ERROR: {runs[0]['error']}")
+            continue
+        best = min(ok, key=lambda r: r["seconds"])
+        results[name] = best
+        print(f"{name:32s} {best['seconds']:7.3f}s  rss={best['max_rss_mb']:7.1f}MB  "
+              f"torch={best['torch_loaded']}  transformers={best['transformers_loaded']}")
+
+    if args.json:
+        pathlib.Path(args.json).write_text(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
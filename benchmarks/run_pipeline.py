@@ -0,0 +1,138 @@
+"""
+Offline end-to-end benchmark for core.pipeline.run.
+
+Starts the local API stub server (NewsData / Firecrawl / Safe Browsing
+replaying benchmarks/fixtures/corpus.json), points the crawler at it, and
+runs the real pipeline into either an SQLite sink or a disposable Postgres
+(the DB_* settings; use --reset to empty it first). Reports articles/sec,
+per-stage p50/p95 latency and peak RSS, and writes everything as JSON so
+runs can be compared across commits.
+
+    python -m benchmarks.run_pipeline --sink sqlite --limit 60
+    python -m benchmarks.run_pipeline --sink postgres --reset --staged --compare benchmarks/results/<old>.json
+"""
+
+import argparse, json, os, pathlib, resource, subprocess, time
+from datetime import datetime, timezone
+
+from benchmarks.stub_server import StubServer, FIXTURE, parse_latency
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+
+def _stages(snap):
+    """Per-stage numbers from the stage_seconds histograms (p50/p95 from the buckets)"""
+    out = {}
+    for key, h in snap["histograms"].items():
+        if not key.startswith("stage_seconds{"):
+            continue
+        labels = dict(kv.split("=", 1) for kv in key[len("stage_seconds{"):-1].split(","))
+        name = labels["stage"] + (f".{labels['table']}" if "table" in labels else "")
+        out[name] = {
+            "calls": h["count"],
+            "total_s": round(h["sum_s"], 4),
+            "p50_ms": round(h["p50_s"] * 1000, 2),
+            "p95_ms": round(h["p95_s"] * 1000, 2),
+        }
+    return out
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except Exception:
+        return None
+
+def _compare(cur, old_path):
+    old = json.loads(pathlib.Path(old_path).read_text(encoding="utf-8"))
+    print(f"\nvs {old.get('commit')} ({old_path}):")
+    a, b = old.get("articles_per_sec") or 0, cur["articles_per_sec"] or 0
+    print(f"  articles/sec   {a:8.2f} -> {b:8.2f}  ({(b - a) / a * 100 if a else 0:+.1f}%)")
+    for stage, s in cur["stages"].items():
+        o = old.get("stages", {}).get(stage)
+        if o:
+            print(f"  {stage:14s} p50 {o['p50_ms']:8.1f} -> {s['p50_ms']:8.1f} ms   "
+                  f"p95 {o['p95_ms']:8.1f} -> {s['p95_ms']:8.1f} ms")
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--sink", choices=["sqlite", "postgres"], default="sqlite")
+    p.add_argument("--reset", action="store_true", help="(postgres) apply schema and truncate tables first")
+    p.add_argument("--corpus", default=str(FIXTURE))
+    p.add_argument("--latency", default="", help="e.g. newsdata=0.3,firecrawl=0.8,safebrowsing=0.05")
+    p.add_argument("--limit", type=int, default=60)
+    p.add_argument("--batch-size", type=int, default=16)
+    p.add_argument("--staged", action="store_true")
+    p.add_argument("--extract-workers", type=int, default=4)
+    p.add_argument("--dry-run", action="store_true", help="Crawl only (no models, no sink)")
+    p.add_argument("--inference-cache", action="store_true", help="Leave the inference cache on")
+    p.add_argument("--out", help="Result file (default: benchmarks/results/<commit>-<time>.json)")
+    p.add_argument("--compare", help="Earlier result JSON to diff against")
+    args = p.parse_args()
+
+    srv = StubServer(args.corpus, parse_latency(args.latency)).start()
+
+    # Must be in place before the crawler / source filter modules read their settings
+    os.environ.update(srv.env())
+    os.environ.update({
+        "NEWSDATA_RPS": "0", "FIRECRAWL_RPS": "0",   # stubs have no quota; measure the code, not the pacing
+        "SB_CACHE_PATH": "", "URL_INDEX_PRELOAD": "0",
+    })
+    if not args.inference_cache:
+        os.environ["INFERENCE_CACHE"] = "0"
+    if args.sink == "sqlite":
+        os.environ["NEAR_DUP"] = "0"   # the LSH index lives in Postgres
+
+    import core.pipeline as pipeline
+    from core.utils import metrics
+
+    url_index = None
+    if args.sink == "sqlite":
+        from benchmarks.sqlite_sink import SqliteSink, SqliteUrlIndex
+        sink = SqliteSink()
+        pipeline.persist_batch = sink.persist_batch
+        url_index = SqliteUrlIndex(sink)
+    elif args.reset and not args.dry_run:
+        from db.init_db import main as init_db
+        from core.utils.db_connect import exec_one
+        init_db()
+        exec_one("TRUNCATE articles, summaries, analysis, sources, crawl_watermarks RESTART IDENTITY CASCADE")
+    metrics.reset()
+
+    t0 = time.perf_counter()
+    saved = pipeline.run(
+        "benchmark", args.limit, dry_run=args.dry_run, batch_size=args.batch_size,
+        staged=args.staged, extract_workers=args.extract_workers,
+        url_index=url_index, incremental=False,
+    )
+    wall = time.perf_counter() - t0
+    srv.stop()
+
+    snap = metrics.snapshot()
+    stages = _stages(snap)
+    fetched = snap["counters"].get("articles_screened_total{}", 0)
+    result = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": vars(args),
+        "articles": fetched,
+        "saved": saved,
+        "wall_s": round(wall, 3),
+        "articles_per_sec": round(fetched / wall, 3) if wall else None,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "stages": stages,
+        "counters": snap["counters"],
+        "stub_hits": srv.hits,
+    }
+
+    print(json.dumps(result, indent=2))
+    out = pathlib.Path(args.out) if args.out else RESULTS_DIR / f"{result['commit'] or 'nogit'}-{int(time.time())}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, indent=2))
+    print(f"Saved {out}")
+
+    if args.compare:
+        _compare(result, args.compare)
+
+if __name__ == "__main__":
+    main()
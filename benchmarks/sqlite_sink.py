@@ -0,0 +1,87 @@
+"""
+SQLite stand-in for the Postgres persistence layer, for offline benchmarks.
+Mirrors persist_batch() semantics (duplicate URLs are skipped together with
+their summary/analysis) and provides a UrlIndex that checks this database.
+"""
+
+import sqlite3, threading
+from core.utils.url_index import UrlIndex
+from core.utils import metrics
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+  domain TEXT PRIMARY KEY, reliability_tag TEXT, last_seen TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS articles (
+  id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, url TEXT UNIQUE NOT NULL, source_domain TEXT,
+  summary TEXT, content TEXT, published_at TEXT, is_verified INTEGER
+);
+CREATE TABLE IF NOT EXISTS summaries (
+  id INTEGER PRIMARY KEY AUTOINCREMENT, article_id INTEGER, neutral_summary TEXT, trust_index INTEGER, reasoning TEXT
+);
+CREATE TABLE IF NOT EXISTS analysis (
+  id INTEGER PRIMARY KEY AUTOINCREMENT, article_id INTEGER, bias_label TEXT, bias_score REAL, final_score REAL
+);
+"""
+
+class SqliteSink:
+    def __init__(self, path: str = ":memory:"):
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def persist_batch(self, items) -> int:
+        saved = 0
+        with metrics.timer(stage="db_write", table="batch"), self._lock, self._db:  # one transaction per batch, like the Postgres path
+            for it in items:
+                a, s, an = it["article"], it["summary"], it["analysis"]
+                self._db.execute("""
+                    INSERT INTO sources(domain, reliability_tag) VALUES (?,?)
+                    ON CONFLICT(domain) DO UPDATE SET reliability_tag=excluded.reliability_tag,
+                                                      last_seen=CURRENT_TIMESTAMP
+                """, (a["source_domain"], a["reliability_tag"]))
+                cur = self._db.execute("""
+                    INSERT OR IGNORE INTO articles(title, url, source_domain, summary, content, published_at, is_verified)
+                    VALUES (?,?,?,?,?,?,?)
+                """, (a["title"], a["url"], a["source_domain"], a["summary"], a["content"],
+                      a["published_at"], a["is_verified"]))
+                if not cur.rowcount:
+                    continue  # duplicate URL
+                aid = cur.lastrowid
+                self._db.execute("INSERT INTO summaries(article_id, neutral_summary, trust_index, reasoning) VALUES (?,?,?,?)",
+                                 (aid, s["neutral_summary"], s["trust_index"], s["reasoning"]))
+                self._db.execute("INSERT INTO analysis(article_id, bias_label, bias_score, final_score) VALUES (?,?,?,?)",
+                                 (aid, an["bias_label"], an["bias_score"], an["final_score"]))
+                saved += 1
+        metrics.inc("articles_saved_total", saved)
+        metrics.inc("duplicates_skipped_total", len(items) - saved, where="persist")
+        return saved
+
+    def known_urls(self, urls) -> set:
+        urls = list(urls)
+        out = set()
+        with self._lock:
+            for i in range(0, len(urls), 500):
+                chunk = urls[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                out.update(r[0] for r in self._db.execute(f"SELECT url FROM articles WHERE url IN ({marks})", chunk))
+        return out
+
+    def count(self, table: str) -> int:
+        with self._lock:
+            return self._db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+class SqliteUrlIndex(UrlIndex):
+    """UrlIndex whose stored-URL lookups hit the SQLite sink instead of Postgres"""
+
+    def __init__(self, sink: SqliteSink):
+        super().__init__(preload=False)
+        self._sink = sink
+
+    def known(self, urls) -> set:
+        urls = {u for u in urls if u}
+        with self._lock:
+            hit = urls & self._seen
+        found = self._sink.known_urls(urls - hit)
+        self.add(found)
+        return hit | found
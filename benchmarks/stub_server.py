@@ -0,0 +1,155 @@
+"""
+Local stand-ins for the external APIs, replaying a fixture corpus:
+
+    GET  /api/1/news               NewsData, paginated with nextPage tokens
+    POST /v1/extract               Firecrawl, text for description-only articles
+    POST /v4/threatMatches:find    Safe Browsing, flags the corpus' unsafe_urls
+
+Each endpoint sleeps for a configurable latency before answering.
+
+    python -m benchmarks.stub_server --port 8765 --latency newsdata=0.3,firecrawl=0.8
+"""
+
+import argparse, json, pathlib, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+FIXTURE = pathlib.Path(__file__).resolve().parent / "fixtures" / "corpus.json"
+
+DEFAULT_LATENCY = {"newsdata": 0.25, "firecrawl": 0.5, "safebrowsing": 0.05}
+
+def parse_latency(spec: str) -> dict:
+    out = dict(DEFAULT_LATENCY)
+    for part in (spec or "").split(","):
+        if "=" in part:
+            k, v = part.split("=", 1)
+            out[k.strip()] = float(v)
+    return out
+
+class StubServer:
+    def __init__(self, corpus_path=FIXTURE, latency=None, host="127.0.0.1", port=0):
+        corpus = json.loads(pathlib.Path(corpus_path).read_text(encoding="utf-8"))
+        self.articles = corpus["articles"]
+        self.page_size = corpus.get("page_size", 10)
+        self.firecrawl = corpus.get("firecrawl", {})
+        self.unsafe = set(corpus.get("unsafe_urls", []))
+        self.latency = latency or dict(DEFAULT_LATENCY)
+        self.hits = {"newsdata": 0, "firecrawl": 0, "safebrowsing": 0}
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> dict:
+        """Environment that points the crawler/source filter at this server"""
+        return {
+            "NEWSDATA_URL": f"{self.base_url}/api/1/news",
+            "FIRECRAWL_URL": f"{self.base_url}/v1/extract",
+            "SAFE_BROWSING_URL": f"{self.base_url}/v4/threatMatches:find",
+            "NEWSDATA_API_KEY": "stub", "FIRECRAWL_API_KEY": "stub", "GOOGLE_SB_API_KEY": "stub",
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="stub-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _count(self, name):
+        with self._lock:
+            self.hits[name] += 1
+        time.sleep(self.latency.get(name, 0))
+
+    # ---------------------------------------------
+    # Endpoint bodies
+    # ---------------------------------------------
+    def news_page(self, token):
+        start = int(token[1:]) if token and token.startswith("p") else 0
+        chunk = self.articles[start:start + self.page_size]
+        nxt = start + self.page_size
+        return {
+            "status": "success",
+            "totalResults": len(self.articles),
+            "results": chunk,
+            "nextPage": f"p{nxt}" if nxt < len(self.articles) else None,
+        }
+
+    def extract(self, url):
+        return {"text": self.firecrawl.get(url, "")}
+
+    def threat_matches(self, body):
+        entries = body.get("threatInfo", {}).get("threatEntries", [])
+        matches = [
+            {"threatType": "SOCIAL_ENGINEERING", "platformType": "ANY_PLATFORM", "threat": {"url": e["url"]}}
+            for e in entries if e.get("url") in self.unsafe
+        ]
+        return {"matches": matches} if matches else {}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+
+            def _send(self, payload, status=200):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _body(self):
+                n = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(n) or b"{}")
+
+            def do_GET(self):
+                u = urlparse(self.path)
+                if u.path == "/api/1/news":
+                    stub._count("newsdata")
+                    token = parse_qs(u.query).get("page", [None])[0]
+                    return self._send(stub.news_page(token))
+                self._send({"error": "not found"}, 404)
+
+            def do_POST(self):
+                u = urlparse(self.path)
+                body = self._body()
+                if u.path == "/v1/extract":
+                    stub._count("firecrawl")
+                    return self._send(stub.extract(body.get("url")))
+                if u.path == "/v4/threatMatches:find":
+                    stub._count("safebrowsing")
+                    return self._send(stub.threat_matches(body))
+                self._send({"error": "not found"}, 404)
+
+            def log_message(self, *args):
+                pass  # keep benchmark output clean
+
+        return Handler
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--corpus", default=str(FIXTURE))
+    p.add_argument("--latency", default="", help="e.g. newsdata=0.3,firecrawl=0.8,safebrowsing=0.05")
+    args = p.parse_args()
+
+    srv = StubServer(args.corpus, parse_latency(args.latency), port=args.port)
+    print(f"Serving stub APIs on {srv.base_url}")
+    for k, v in srv.env().items():
+        print(f"  {k}={v}")
+    try:
+        srv.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
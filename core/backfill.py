@@ -0,0 +1,206 @@
+"""
+Re-score stored articles after a model, truncation or final_score change.
+
+Articles whose summaries.model_version / analysis.model_version differ from
+the current SUMMARY_VERSION / ANALYSIS_VERSION (see core/pipeline.py) are
+streamed through a server-side named cursor, CHUNK rows at a time, re-run
+through the batched summarizer and/or analyzer and upserted (one summary and
+one analysis row per article). Only the stale side is recomputed: a new
+final_score formula re-uses the stored bias label/score without any model.
+
+The archive is split into --workers shards (article id % workers), one
+process each. Every chunk's results are committed together with the shard's
+checkpoint in backfill_checkpoints, so a killed backfill resumes where it
+stopped; memory stays at one chunk per worker. The source rollups are rebuilt
+once every shard has finished, if this run re-scored anything (after a run
+that was killed at that point: `python -m core.rollups --rebuild`).
+
+    python -m core.backfill                         # re-score whatever is stale
+    python -m core.backfill --workers 4 --chunk 256
+    python -m core.backfill --restart               # forget this job's checkpoints
+"""
+
+import argparse, os, time, multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from psycopg2.extras import execute_values
+from agents.summarizer_agent import summarize_batch
+from agents.analyzer_agent import analyze_bias_batch
+from core.pipeline import final_score, SUMMARY_VERSION, ANALYZER_VERSION, ANALYSIS_VERSION
+from core.utils.db_connect import connection, transaction, exec_one
+from core.utils.logger import get_logger
+from core.utils import metrics
+from core import rollups, search
+
+log = get_logger("backfill")
+
+CHUNK = int(os.getenv("BACKFILL_CHUNK", "128"))
+
+_STALE_SQL = """
+    SELECT a.id, a.content, a.summary, src.reliability_tag,
+           s.trust_index, s.model_version AS summary_version,
+           an.bias_label, an.bias_score, an.model_version AS analysis_version
+    FROM articles a
+    LEFT JOIN sources src ON src.domain = a.source_domain
+    LEFT JOIN summaries s ON s.article_id = a.id
+    LEFT JOIN analysis an ON an.article_id = a.id
+    WHERE a.id > %(after)s AND a.id %% %(shards)s = %(shard)s
+      AND (s.model_version IS DISTINCT FROM %(sv)s OR an.model_version IS DISTINCT FROM %(av)s)
+    ORDER BY a.id
+"""
+
+def default_job() -> str:
+    """Named after the target versions, so a new model or formula starts a fresh job"""
+    return f"{SUMMARY_VERSION}|{ANALYSIS_VERSION}"
+
+def _checkpoint(job: str, shards: int, shard: int) -> dict:
+    return exec_one("""
+        INSERT INTO backfill_checkpoints(job, shards, shard) VALUES (%s,%s,%s)
+        ON CONFLICT (job, shards, shard) DO UPDATE SET updated_at = NOW()
+        RETURNING last_id, processed, done
+    """, (job, shards, shard))[0]
+
+def _needs_analyzer(r) -> bool:
+    # Same analyzer, only the final_score formula changed -> keep the stored label/score
+    v = r["analysis_version"]
+    return r["bias_label"] is None or not v or not v.startswith(f"{ANALYZER_VERSION}+")
+
+def _rescore(rows):
+    """(summary rows, analysis rows) to upsert for one chunk"""
+    resum = [r for r in rows if r["summary_version"] != SUMMARY_VERSION]
+    reanalyze = [r for r in rows if _needs_analyzer(r)]
+
+    summaries, analyses = {}, {}
+    if resum:
+        with metrics.timer(stage="summarize"):
+            summaries = dict(zip((r["id"] for r in resum), summarize_batch(resum)))
+    if reanalyze:
+        with metrics.timer(stage="analyze"):
+            out = analyze_bias_batch([r["content"] or r["summary"] or "" for r in reanalyze])
+        analyses = dict(zip((r["id"] for r in reanalyze), out))
+    metrics.inc("articles_inferred_total", len(set(summaries) | set(analyses)))
+
+    sum_rows, an_rows = [], []
+    for r in rows:
+        s = summaries.get(r["id"]) or {"trust_index": r["trust_index"]}
+        an = analyses.get(r["id"]) or {"bias_label": r["bias_label"], "bias_score": r["bias_score"]}
+        if r["id"] in summaries:
+            sum_rows.append((r["id"], s["neutral_summary"], s["trust_index"], s["reasoning"], SUMMARY_VERSION))
+        an_rows.append((r["id"], an["bias_label"], an["bias_score"], final_score(s, an), ANALYSIS_VERSION))
+    return sum_rows, an_rows
+
+def _write(cur, sum_rows, an_rows):
+    if sum_rows:
+        execute_values(cur, """
+            INSERT INTO summaries(article_id, neutral_summary, trust_index, reasoning, model_version)
+            VALUES %s
+            ON CONFLICT (article_id) DO UPDATE SET
+              neutral_summary=EXCLUDED.neutral_summary, trust_index=EXCLUDED.trust_index,
+              reasoning=EXCLUDED.reasoning, model_version=EXCLUDED.model_version, created_at=NOW()
+        """, sum_rows, page_size=len(sum_rows))
+        search.refresh_vectors(cur, [r[0] for r in sum_rows])
+    execute_values(cur, """
+        INSERT INTO analysis(article_id, bias_label, bias_score, final_score, model_version)
+        VALUES %s
+        ON CONFLICT (article_id) DO UPDATE SET
+          bias_label=EXCLUDED.bias_label, bias_score=EXCLUDED.bias_score,
+          final_score=EXCLUDED.final_score, model_version=EXCLUDED.model_version, created_at=NOW()
+    """, an_rows, page_size=len(an_rows))
+
+def run_shard(job: str, shards: int = 1, shard: int = 0, chunk: int = CHUNK) -> int:
+    """Re-score one shard, resuming from its checkpoint. Returns the number of articles re-scored."""
+    cp = _checkpoint(job, shards, shard)
+    if cp["done"]:
+        log.info(f"[{job} {shard}/{shards}] already done ({cp['processed']} articles)")
+        return 0
+
+    n, t0 = 0, time.perf_counter()
+    params = {"after": cp["last_id"], "shards": shards, "shard": shard, "sv": SUMMARY_VERSION, "av": ANALYSIS_VERSION}
+    with connection() as conn:
+        # Named cursor: rows stay on the server and arrive `chunk` at a time
+        with conn.cursor(name=f"backfill_{shard}") as cur:
+            cur.itersize = chunk
+            cur.execute(_STALE_SQL, params)
+            while True:
+                rows = cur.fetchmany(chunk)
+                if not rows:
+                    break
+                sum_rows, an_rows = _rescore(rows)
+                # Results and checkpoint commit together: a kill never skips or half-writes a chunk
+                with metrics.timer(stage="db_write", table="backfill"), transaction() as wcur:
+                    _write(wcur, sum_rows, an_rows)
+                    wcur.execute("""
+                        UPDATE backfill_checkpoints
+                        SET last_id = %s, processed = processed + %s, updated_at = NOW()
+                        WHERE job = %s AND shards = %s AND shard = %s
+                    """, (rows[-1]["id"], len(rows), job, shards, shard))
+                n += len(rows)
+                metrics.inc("articles_rescored_total", len(rows))
+                log.info(f"[{job} {shard}/{shards}] {n} articles re-scored (up to id {rows[-1]['id']}, "
+                         f"{n / (time.perf_counter() - t0):.1f}/s)")
+        conn.rollback()
+
+    exec_one("""
+        UPDATE backfill_checkpoints SET done = TRUE, updated_at = NOW()
+        WHERE job = %s AND shards = %s AND shard = %s
+    """, (job, shards, shard))
+    return n
+
+# ---------------------------------------------
+# Worker processes
+# ---------------------------------------------
+def _init_worker(threads: int):
+    from core.workers import _limit_threads
+    from core.utils import models
+    _limit_threads(threads)
+    models.warm()
+
+def _run_shard(job: str, shards: int, shard: int, chunk: int):
+    return shard, run_shard(job, shards, shard, chunk), metrics.drain()
+
+def backfill(workers: int = 1, chunk: int = CHUNK, job: str = None, restart: bool = False,
+             rebuild_rollups: bool = True) -> int:
+    """Re-score every stale article across `workers` processes. Returns the number re-scored in this run."""
+    job = job or default_job()
+    workers = max(1, workers)
+    if restart:
+        exec_one("DELETE FROM backfill_checkpoints WHERE job = %s AND shards = %s", (job, workers))
+    log.info(f"Backfill '{job}' with {workers} worker(s), chunks of {chunk}")
+
+    total, failed = 0, 0
+    if workers == 1:
+        total = run_shard(job, 1, 0, chunk)
+    else:
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        ctx = mp.get_context("spawn")  # no forked torch / DB state in the children
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker,
+                                 initargs=(threads,)) as pool:
+            futures = {pool.submit(_run_shard, job, workers, k, chunk): k for k in range(workers)}
+            for f in as_completed(futures):
+                try:
+                    shard, n, numbers = f.result()
+                    total += n
+                    metrics.merge(numbers)
+                except Exception as e:
+                    failed += 1
+                    log.error(f"Shard {futures[f]} failed (rerun to resume it): {e}")
+
+    if failed:
+        log.warning(f"{failed} shard(s) failed; rollups left as they are until the backfill completes")
+        return total
+
+    if rebuild_rollups and total:
+        rollups.rebuild()
+    log.info(f"✅ Backfill '{job}' complete: {total} articles re-scored in this run")
+    return total
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--workers", type=int, default=1, help="Processes (shards of the archive) to re-score with")
+    p.add_argument("--chunk", type=int, default=CHUNK, help="Articles fetched, inferred and committed at a time")
+    p.add_argument("--job", default=None, help="Checkpoint name (default: derived from the current model versions)")
+    p.add_argument("--restart", action="store_true", help="Ignore saved checkpoints for this job")
+    p.add_argument("--no-rollups", dest="rebuild_rollups", action="store_false",
+                   help="Skip the source rollup rebuild at the end")
+    args = p.parse_args()
+    backfill(workers=args.workers, chunk=args.chunk, job=args.job, restart=args.restart,
+             rebuild_rollups=args.rebuild_rollups)
@@ -0,0 +1,83 @@
+"""
+Article feed query with keyset pagination.
+
+Pages are ordered newest first on (COALESCE(published_at, '-infinity'), id)
+and continue strictly after the last row of the previous page, so page N
+costs the same as page 1 (an index range scan, no OFFSET). Filters run in
+Postgres: source, reliability tag, bias label and final-score range.
+
+    rows, cursor = feed_page(limit=50, reliability="trusted")
+    more, cursor = feed_page(cursor=cursor, limit=50, reliability="trusted")
+"""
+
+from datetime import datetime
+from core.utils.db_connect import exec_one
+
+MAX_PAGE = 500
+
+# Must match idx_articles_feed / idx_articles_source_feed in db/schema.sql
+SORT_KEY = "COALESCE(a.published_at, '-infinity'::timestamptz)"
+
+def encode_cursor(cursor) -> str:
+    """(published_at, id) -> 'iso|id', e.g. for query strings"""
+    if cursor is None:
+        return ""
+    published, aid = cursor
+    return f"{published.isoformat() if published else ''}|{aid}"
+
+def decode_cursor(s: str):
+    if not s:
+        return None
+    published, aid = s.rsplit("|", 1)
+    return (datetime.fromisoformat(published) if published else None, int(aid))
+
+def feed_page(cursor=None, limit: int = 50, source: str = None, reliability: str = None,
+              bias_label: str = None, min_score: float = None, max_score: float = None):
+    """
+    One page of articles (newest first) with trust/bias columns.
+    `cursor` is the (published_at, id) of the last row of the previous page, None for
+    the first page. Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    limit = max(1, min(int(limit), MAX_PAGE))
+    where, params = [], []
+
+    if cursor is not None:
+        where.append(f"({SORT_KEY}, a.id) < (COALESCE(%s::timestamptz, '-infinity'::timestamptz), %s)")
+        params += [cursor[0], cursor[1]]
+    if source:
+        where.append("a.source_domain = %s")
+        params.append(source)
+    if reliability:
+        where.append("a.source_domain IN (SELECT domain FROM sources WHERE reliability_tag = %s)")
+        params.append(reliability)
+    if bias_label:
+        where.append("an.bias_label = %s")
+        params.append(bias_label)
+    if min_score is not None:
+        where.append("an.final_score >= %s")
+        params.append(min_score)
+    if max_score is not None:
+        where.append("an.final_score <= %s")
+        params.append(max_score)
+
+    # Score filters need an analysis row; otherwise articles without one still show up
+    join = "JOIN" if (bias_label or min_score is not None or max_score is not None) else "LEFT JOIN"
+    rows = exec_one(f"""
+        SELECT a.id, a.title, a.url, a.source_domain,
+               s.trust_index, an.bias_label, an.final_score, a.published_at
+        FROM articles a
+        LEFT JOIN LATERAL (
+          SELECT trust_index FROM summaries WHERE article_id = a.id ORDER BY id LIMIT 1
+        ) s ON TRUE
+        {join} LATERAL (
+          SELECT bias_label, final_score FROM analysis WHERE article_id = a.id ORDER BY id LIMIT 1
+        ) an ON TRUE
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY {SORT_KEY} DESC, a.id DESC
+        LIMIT %s
+    """, (*params, limit + 1)) or []
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, (rows[-1]["published_at"], rows[-1]["id"])
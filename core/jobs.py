@@ -0,0 +1,228 @@
+"""
+Background ingestion jobs.
+
+The dashboard enqueues a row in `jobs`; long-lived worker processes
+(`python -m core.jobs worker`) claim rows with FOR UPDATE SKIP LOCKED, so any
+number of workers can share the queue. Each worker keeps the models warm
+and runs core.pipeline.run, writing fetched/processed/saved counts back
+to the row while it goes. Identical requests that are already queued or
+running are merged into the existing job instead of starting another run.
+"""
+
+import argparse, os, select, socket, threading, time
+from psycopg2.extras import Json
+from core.utils.db_connect import transaction, exec_one, get_conn
+from core.utils.logger import get_logger
+from dotenv import load_dotenv
+load_dotenv()
+
+log = get_logger("jobs")
+
+CHANNEL = "jobs_pending"
+POLL_SECS = float(os.getenv("JOBS_POLL_SECS", "5"))
+HEARTBEAT_SECS = float(os.getenv("JOBS_HEARTBEAT_SECS", "15"))
+STALE_SECS = float(os.getenv("JOBS_STALE_SECS", "120"))          # running job with no heartbeat -> requeued
+PROGRESS_EVERY = float(os.getenv("JOBS_PROGRESS_SECS", "1"))      # min seconds between progress writes
+
+# pipeline.run options a job may carry
+RUN_OPTS = ("batch_size", "staged", "incremental", "countries")
+
+# ---------------------------------------------
+# Queue API (used by the dashboard)
+# ---------------------------------------------
+def enqueue(topic: str, limit: int, **opts) -> int:
+    """Queue an ingestion run; returns the id of the new job or of an identical active one"""
+    params = {"topic": topic, "limit": int(limit), **{k: v for k, v in opts.items() if k in RUN_OPTS}}
+    with transaction() as cur:
+        cur.execute("""
+            INSERT INTO jobs(kind, params) VALUES ('ingest', %s)
+            ON CONFLICT (kind, params) WHERE status IN ('pending','running') DO NOTHING
+            RETURNING id
+        """, (Json(params),))
+        row = cur.fetchone()
+        if row:
+            cur.execute(f"NOTIFY {CHANNEL}")  # delivered on commit
+            return row["id"]
+        cur.execute("""
+            SELECT id FROM jobs
+            WHERE kind = 'ingest' AND params = %s AND status IN ('pending','running')
+        """, (Json(params),))
+        row = cur.fetchone()
+    if row is None:  # finished between the two statements; queue it again
+        return enqueue(topic, limit, **opts)
+    return row["id"]
+
+def get(job_ids) -> list:
+    """Current state of the given jobs"""
+    ids = list(job_ids)
+    if not ids:
+        return []
+    return exec_one("""
+        SELECT id, params, status, fetched, processed, saved, error,
+               created_at, started_at, finished_at
+        FROM jobs WHERE id = ANY(%s) ORDER BY id
+    """, (ids,)) or []
+
+def recent(limit: int = 20) -> list:
+    return exec_one("""
+        SELECT id, params, status, fetched, processed, saved, error, created_at, finished_at
+        FROM jobs ORDER BY id DESC LIMIT %s
+    """, (limit,)) or []
+
+# ---------------------------------------------
+# Worker side
+# ---------------------------------------------
+def claim(worker: str):
+    """Take the oldest pending job (or None). Concurrent workers never get the same row."""
+    rows = exec_one("""
+        UPDATE jobs SET status = 'running', worker = %s, started_at = NOW(), heartbeat_at = NOW()
+        WHERE id = (
+          SELECT id FROM jobs WHERE status = 'pending'
+          ORDER BY id
+          FOR UPDATE SKIP LOCKED
+          LIMIT 1
+        )
+        RETURNING id, params
+    """, (worker,))
+    return rows[0] if rows else None
+
+def progress(job_id: int, fetched: int, processed: int, saved: int):
+    exec_one("""
+        UPDATE jobs SET fetched = %s, processed = %s, saved = %s, heartbeat_at = NOW()
+        WHERE id = %s
+    """, (fetched, processed, saved, job_id))
+
+def heartbeat(job_id: int):
+    exec_one("UPDATE jobs SET heartbeat_at = NOW() WHERE id = %s AND status = 'running'", (job_id,))
+
+def finish(job_id: int, saved: int = None, error: str = None):
+    exec_one("""
+        UPDATE jobs SET status = %s, error = %s, finished_at = NOW(),
+                        saved = COALESCE(%s, saved)
+        WHERE id = %s
+    """, ("failed" if error else "done", error, saved, job_id))
+
+def requeue_stale(stale_secs: float = STALE_SECS) -> int:
+    """Put jobs whose worker stopped heartbeating back in the queue"""
+    rows = exec_one("""
+        UPDATE jobs SET status = 'pending', worker = NULL
+        WHERE status = 'running' AND heartbeat_at < NOW() - make_interval(secs => %s)
+        RETURNING id
+    """, (stale_secs,)) or []
+    if rows:
+        log.warning(f"Requeued stale jobs: {[r['id'] for r in rows]}")
+    return len(rows)
+
+class _Heartbeat(threading.Thread):
+    """Keeps heartbeat_at fresh while a long model batch runs without progress updates"""
+
+    def __init__(self, job_id):
+        super().__init__(name=f"job-{job_id}-heartbeat", daemon=True)
+        self.job_id = job_id
+        self.done = threading.Event()
+
+    def run(self):
+        while not self.done.wait(HEARTBEAT_SECS):
+            try:
+                heartbeat(self.job_id)
+            except Exception as e:
+                log.warning(f"Heartbeat for job {self.job_id} failed: {e}")
+
+def _execute(job):
+    from core.pipeline import run
+    from core.utils.url_index import UrlIndex
+
+    job_id, params = job["id"], dict(job["params"])
+    topic, limit = params.pop("topic"), params.pop("limit")
+    log.info(f"Job {job_id}: '{topic}' (limit {limit})")
+
+    state = {"at": 0.0, "counts": (0, 0, 0)}
+    def _progress(fetched, processed, saved):
+        state["counts"] = (fetched, processed, saved)
+        now = time.monotonic()
+        if now - state["at"] >= PROGRESS_EVERY:
+            state["at"] = now
+            progress(job_id, fetched, processed, saved)
+
+    hb = _Heartbeat(job_id)
+    hb.start()
+    try:
+        # Fresh index per job: URLs claimed by a failed job must be retryable by the next one
+        saved = run(topic, limit, url_index=UrlIndex(), progress=_progress,
+                    **{k: v for k, v in params.items() if k in RUN_OPTS})
+        progress(job_id, *state["counts"])  # the last update may have been throttled
+        finish(job_id, saved=saved)
+        log.info(f"Job {job_id} done: {saved} saved")
+    except Exception as e:
+        log.exception(f"Job {job_id} failed: {e}")
+        finish(job_id, error=str(e))
+    finally:
+        hb.done.set()
+
+def _listen():
+    """Unpooled autocommit connection LISTENing for new jobs (None if that fails; we poll instead)"""
+    try:
+        conn = get_conn()
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {CHANNEL}")
+        return conn
+    except Exception as e:
+        log.warning(f"LISTEN unavailable, polling every {POLL_SECS}s: {e}")
+        return None
+
+def _wait(conn, timeout: float):
+    if conn is None:
+        time.sleep(timeout)
+        return
+    if select.select([conn], [], [], timeout)[0]:
+        conn.poll()
+        conn.notifies.clear()
+
+def work(max_jobs: int = None, poll: float = POLL_SECS):
+    """Worker loop: load the models once, then run jobs as they arrive"""
+    from core.utils import models
+    import core.pipeline  # registers the agents' models
+
+    name = f"{socket.gethostname()}:{os.getpid()}"
+    models.warm()
+    conn = _listen()
+    log.info(f"Job worker {name} ready")
+
+    done = 0
+    last_sweep = 0.0
+    while max_jobs is None or done < max_jobs:
+        if time.monotonic() - last_sweep > STALE_SECS / 2:
+            requeue_stale()
+            last_sweep = time.monotonic()
+        job = claim(name)
+        if job is None:
+            _wait(conn, poll)
+            continue
+        _execute(job)
+        done += 1
+
+# -------------------------------
+# CLI entry point
+# -------------------------------
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    sub = p.add_subparsers(dest="cmd", required=True)
+    w = sub.add_parser("worker", help="Run a job worker (keeps the models loaded)")
+    w.add_argument("--max-jobs", type=int, default=None, help="Exit after this many jobs")
+    e = sub.add_parser("enqueue", help="Queue an ingestion job")
+    e.add_argument("--topic", default="latest")
+    e.add_argument("--limit", type=int, default=20)
+    e.add_argument("--staged", action="store_true")
+    sub.add_parser("list", help="Show recent jobs")
+    args = p.parse_args()
+
+    if args.cmd == "worker":
+        work(max_jobs=args.max_jobs)
+    elif args.cmd == "enqueue":
+        opts = {"staged": True} if args.staged else {}
+        log.info(f"Queued job {enqueue(args.topic, args.limit, **opts)}")
+    else:
+        for j in recent():
+            log.info(f"#{j['id']} {j['status']:8s} {j['params']} fetched={j['fetched']} "
+                     f"processed={j['processed']} saved={j['saved']} {j['error'] or ''}")
@@ -0,0 +1,231 @@
+"""
+Near-duplicate story detection before inference.
+
+Wire copies and syndicated rewrites of one story differ by a byline or a
+paragraph, so neither the URL index nor the exact-content inference cache
+catches them. Each article's content is fingerprinted with MinHash over
+word 5-gram shingles (NUM_PERM 32-bit minimums). The signature is cut into
+BANDS bands of ROWS values, and every band is hashed into a bucket (LSH).
+Two articles whose shingle sets have Jaccard similarity s share at least
+one bucket with probability 1 - (1 - s^ROWS)^BANDS, which is about 0.95
+at s = 0.8 and about 0.01 at s = 0.4.
+
+Only canonical articles are indexed. article_lsh_bands holds one
+(band, bucket) row per band and is looked up by primary key.
+article_signatures holds the signature used to confirm a candidate
+(estimated Jaccard >= NEAR_DUP_THRESHOLD). A lookup therefore costs
+BANDS index probes plus a few candidates, however large the archive.
+articles.cluster_id points every article at its canonical copy (itself for
+canonicals). Later copies reuse the canonical's summary and analysis
+instead of running the models again.
+
+    python -m core.neardup --backfill      # fingerprint articles stored before this existed
+"""
+
+import argparse, hashlib, os, re
+import numpy as np
+from psycopg2.extras import execute_values
+from core.utils.db_connect import exec_one, transaction
+from core.utils.logger import get_logger
+
+log = get_logger("neardup")
+
+ENABLED = os.getenv("NEAR_DUP", "1") != "0"
+THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.8"))
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 5
+MIN_SHINGLES = 20                   # shorter texts (teasers, empty extractions) are never clustered
+
+# Fixed seed: signatures are persisted, so the permutations must never change
+_MERSENNE = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_rng = np.random.RandomState(1)
+_A = _rng.randint(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)   # a, b, x < 2^32: a*x + b never overflows
+_B = _rng.randint(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+
+_WORD = re.compile(r"\w+")
+
+# ---------------------------------------------
+# MinHash / LSH
+# ---------------------------------------------
+def shingles(text: str) -> set:
+    words = _WORD.findall((text or "").lower())
+    return {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+def signature(text: str):
+    """uint32[NUM_PERM] MinHash signature, or None when the text is too short to fingerprint"""
+    sh = shingles(text)
+    if len(sh) < MIN_SHINGLES:
+        return None
+    hv = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in sh),
+        dtype=np.uint64, count=len(sh),
+    )
+    # (a*x + b) mod p per permutation, truncated to 32 bits
+    phv = ((np.outer(hv, _A) + _B) % _MERSENNE) & _MAX_HASH
+    return phv.min(axis=0).astype(np.uint32)
+
+def band_keys(sig) -> list:
+    """[(band, bucket)]: one signed 64-bit bucket hash per band of ROWS values"""
+    raw = sig.astype("<u4").tobytes()
+    width = ROWS * 4
+    return [
+        (b, int.from_bytes(hashlib.blake2b(raw[b * width:(b + 1) * width], digest_size=8).digest(), "little", signed=True))
+        for b in range(BANDS)
+    ]
+
+def similarity(a, b) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+def _from_db(raw):
+    return np.frombuffer(bytes(raw), dtype="<u4")
+
+# ---------------------------------------------
+# Lookup (before inference)
+# ---------------------------------------------
+def _candidates(keys) -> dict:
+    """Stored canonicals sharing at least one bucket: {article_id: (cluster_id, signature)}"""
+    if not keys:
+        return {}
+    with transaction() as cur:
+        rows = execute_values(cur, """
+            SELECT DISTINCT b.article_id, a.cluster_id, s.signature
+            FROM (VALUES %s) AS v(band, bucket)
+            JOIN article_lsh_bands b ON b.band = v.band AND b.bucket = v.bucket
+            JOIN article_signatures s ON s.article_id = b.article_id
+            JOIN articles a ON a.id = b.article_id
+        """, sorted(keys), template="(%s::smallint, %s::bigint)", page_size=len(keys), fetch=True)
+    return {r["article_id"]: (r["cluster_id"] or r["article_id"], _from_db(r["signature"])) for r in rows}
+
+def match(arts) -> list:
+    """
+    One link dict per article:
+        {"fingerprint": {"signature", "bands"} | None, "cluster_id": stored canonical id | None,
+         "index": position of an earlier canonical in `arts` | None, "canonical_url", "similarity"}
+    Articles with neither cluster_id nor index are new stories. Only the first
+    copy of a story inside the batch is matched against; it is the canonical.
+    """
+    links = []
+    for a in arts:
+        sig = signature(a.get("content") or "") if ENABLED else None
+        links.append({
+            "fingerprint": {"signature": sig, "bands": band_keys(sig)} if sig is not None else None,
+            "cluster_id": None, "index": None, "canonical_url": None, "similarity": None,
+        })
+    fingerprinted = [l for l in links if l["fingerprint"]]
+    if not fingerprinted:
+        return links
+
+    stored = _candidates({k for l in fingerprinted for k in l["fingerprint"]["bands"]})
+    batch_buckets = {}   # (band, bucket) -> indices of in-batch canonicals
+    for i, l in enumerate(links):
+        fp = l["fingerprint"]
+        if fp is None:
+            continue
+        keys = set(fp["bands"])
+        best = None   # (similarity, "stored" | "batch", cluster id | batch index); ties go to stored
+        for cluster, sig in stored.values():
+            sim = similarity(fp["signature"], sig)
+            if sim >= THRESHOLD and (best is None or sim > best[0]):
+                best = (sim, "stored", cluster)
+        for j in {j for k in keys for j in batch_buckets.get(k, ())}:
+            sim = similarity(fp["signature"], links[j]["fingerprint"]["signature"])
+            if sim >= THRESHOLD and (best is None or sim > best[0]):
+                best = (sim, "batch", j)
+
+        if best is None:
+            for k in keys:
+                batch_buckets.setdefault(k, []).append(i)
+        elif best[1] == "stored":
+            l.update(cluster_id=best[2], similarity=best[0])
+        else:
+            l.update(index=best[2], canonical_url=arts[best[2]]["url"], similarity=best[0])
+    return links
+
+def stored_results(cluster_ids) -> dict:
+    """{canonical id: (summary, analysis)} for canonicals that have both"""
+    if not cluster_ids:
+        return {}
+    rows = exec_one("""
+        SELECT s.article_id AS id, s.neutral_summary, s.trust_index, s.reasoning, s.model_version AS summary_version,
+               an.bias_label, an.bias_score, an.model_version AS analysis_version
+        FROM summaries s
+        JOIN analysis an ON an.article_id = s.article_id
+        WHERE s.article_id = ANY(%s)
+    """, (sorted(cluster_ids),)) or []
+    return {
+        r["id"]: (
+            {"neutral_summary": r["neutral_summary"], "trust_index": r["trust_index"], "reasoning": r["reasoning"],
+             "model_version": r["summary_version"]},
+            {"bias_label": r["bias_label"], "bias_score": r["bias_score"], "model_version": r["analysis_version"]},
+        )
+        for r in rows
+    }
+
+# ---------------------------------------------
+# Persistence (inside persist_batch's transaction)
+# ---------------------------------------------
+def apply(cur, new):
+    """
+    Link newly stored articles to their cluster and index the canonicals.
+    new: [(article_id, item)] as inserted by persist_batch.
+    """
+    ids = {it["article"]["url"]: aid for aid, it in new}
+    clusters, canonicals = [], []
+    for aid, it in new:
+        link = it.get("near_dup") or {}
+        cluster = link.get("cluster_id") or ids.get(link.get("canonical_url")) or aid
+        clusters.append((aid, cluster))
+        if cluster == aid and link.get("fingerprint"):
+            canonicals.append((aid, link["fingerprint"]))
+    if not clusters:
+        return
+
+    execute_values(cur, """
+        UPDATE articles a SET cluster_id = v.cluster_id
+        FROM (VALUES %s) AS v(id, cluster_id)
+        WHERE a.id = v.id
+    """, clusters, template="(%s::bigint, %s::bigint)", page_size=len(clusters))
+
+    if canonicals:
+        execute_values(cur, """
+            INSERT INTO article_signatures(article_id, signature) VALUES %s
+            ON CONFLICT (article_id) DO NOTHING
+        """, [(aid, fp["signature"].astype("<u4").tobytes()) for aid, fp in canonicals], page_size=len(canonicals))
+        execute_values(cur, """
+            INSERT INTO article_lsh_bands(band, bucket, article_id) VALUES %s
+            ON CONFLICT DO NOTHING
+        """, [(band, bucket, aid) for aid, fp in canonicals for band, bucket in fp["bands"]],
+            page_size=len(canonicals) * BANDS)
+
+def backfill(batch: int = 1000) -> int:
+    """Cluster stored articles that have no cluster_id yet, oldest first, so the oldest copy stays canonical"""
+    total, last = 0, 0
+    while True:
+        rows = exec_one("""
+            SELECT id, url, content FROM articles
+            WHERE cluster_id IS NULL AND id > %s
+            ORDER BY id LIMIT %s
+        """, (last, batch)) or []
+        if not rows:
+            break
+        links = match(rows)
+        with transaction() as cur:
+            apply(cur, [(r["id"], {"article": r, "near_dup": l}) for r, l in zip(rows, links)])
+        total += len(rows)
+        last = rows[-1]["id"]
+        dups = sum(1 for l in links if l["cluster_id"] or l["index"] is not None)
+        log.info(f"Clustered {total} articles (up to id {last}), {dups} near-duplicates in this batch")
+    return total
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--backfill", action="store_true", help="Fingerprint and cluster articles without a cluster_id")
+    args = p.parse_args()
+    if args.backfill:
+        log.info(f"✅ Clustered {backfill()} articles")
+    else:
+        p.print_help()
@@ -0,0 +1,96 @@
+"""
+Bulk persistence for processed articles.
+One call writes a whole batch (sources, articles, summaries, analysis) in a
+single transaction using multi-row INSERTs, instead of one autocommitted
+statement per row. The per-source rollups and the near-duplicate clusters
+are updated in that transaction too.
+"""
+
+import os
+from psycopg2.extras import execute_values
+from core.utils.db_connect import transaction
+from core.utils.logger import get_logger
+from core.utils import metrics
+from core import rollups, search, neardup
+
+log = get_logger("persistence")
+
+BATCH_SIZE = int(os.getenv("PERSIST_BATCH_SIZE", "50"))
+
+def _article_row(it):
+    a = it["article"]
+    return (a["title"], a["url"], a["source_domain"], a["summary"], a["content"], a["published_at"], a["is_verified"],
+            *search.vector_params(a, it["summary"]["neutral_summary"]))
+
+def persist_batch(items):
+    """
+    items: list of {"article": ..., "summary": ..., "analysis": ..., "near_dup": ...} dicts
+    ("near_dup" is optional, see core.neardup.match).
+    Articles whose URL already exists are skipped (ON CONFLICT (url) DO NOTHING),
+    together with their summary/analysis. Returns the number of new articles saved.
+    """
+    if not items:
+        return 0
+
+    # Multi-row upserts can't touch the same key twice, so dedupe inside the batch first
+    sources = {}
+    by_url = {}
+    for it in items:
+        a = it["article"]
+        sources[a["source_domain"]] = a["reliability_tag"]
+        by_url.setdefault(a["url"], it)
+
+    with metrics.timer(stage="db_write", table="batch"), transaction() as cur:
+        with metrics.timer(stage="db_write", table="sources"):
+            execute_values(cur, """
+                INSERT INTO sources(domain, reliability_tag, last_seen)
+                VALUES %s
+                ON CONFLICT(domain) DO UPDATE SET
+                  reliability_tag=EXCLUDED.reliability_tag,
+                  last_seen=NOW()
+            """, list(sources.items()), template="(%s,%s,NOW())", page_size=len(sources))
+
+        with metrics.timer(stage="db_write", table="articles"):
+            # The neutral summary is already known here, so the search vector is complete on insert
+            rows = execute_values(cur, """
+                INSERT INTO articles(title, url, source_domain, summary, content, published_at, is_verified, search_vector)
+                VALUES %s
+                ON CONFLICT (url) DO NOTHING
+                RETURNING id, url
+            """, [_article_row(it) for it in by_url.values()],
+                template=f"(%s,%s,%s,%s,%s,%s,%s, {search.VECTOR_SQL})", page_size=len(by_url), fetch=True)
+
+        # Only URLs that were actually inserted come back; everything else was a duplicate
+        new = [(r["id"], by_url[r["url"]]) for r in rows]
+        if new:
+            with metrics.timer(stage="db_write", table="summaries"):
+                execute_values(cur, """
+                    INSERT INTO summaries(article_id, neutral_summary, trust_index, reasoning, model_version)
+                    VALUES %s
+                """, [
+                    (aid, it["summary"]["neutral_summary"], it["summary"]["trust_index"], it["summary"]["reasoning"],
+                     it["summary"].get("model_version"))
+                    for aid, it in new
+                ], page_size=len(new))
+
+            with metrics.timer(stage="db_write", table="analysis"):
+                execute_values(cur, """
+                    INSERT INTO analysis(article_id, bias_label, bias_score, final_score, model_version)
+                    VALUES %s
+                """, [
+                    (aid, it["analysis"]["bias_label"], it["analysis"]["bias_score"], it["analysis"]["final_score"],
+                     it["analysis"].get("model_version"))
+                    for aid, it in new
+                ], page_size=len(new))
+
+            with metrics.timer(stage="db_write", table="clusters"):
+                neardup.apply(cur, new)
+
+            # Same transaction: the per-source aggregates move exactly when the articles land
+            with metrics.timer(stage="db_write", table="source_rollups"):
+                rollups.apply(cur, [it for _, it in new])
+
+    metrics.inc("articles_saved_total", len(new))
+    metrics.inc("duplicates_skipped_total", len(items) - len(new), where="persist")
+    log.debug(f"Persisted batch: {len(new)} new / {len(items)} processed")
+    return len(new)
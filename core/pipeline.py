@@ -1,85 +1,192 @@
 import argparse, os     #argparse → lets you run the script with command-line arguments like --topic ai --limit 20
 from datetime import datetime
 from core.utils.logger import get_logger
-from agents.crawler_agent import fetch_news
-from agents.summarizer_agent import summarize
-from agents.analyzer_agent import analyze_bias
-from core.utils.db_connect import exec_one
+from agents.crawler_agent import iter_news_pages
+from agents.summarizer_agent import summarize_batch, for_source, FAILED, MODEL_VERSION as SUMMARY_VERSION
+from agents.analyzer_agent import analyze_bias_batch, UNKNOWN, MODEL_VERSION as ANALYZER_VERSION
+from core.persistence import persist_batch, BATCH_SIZE
+from core.utils.url_index import UrlIndex
+from core.utils.watermarks import Watermark
+from core.utils import inference_cache, metrics
+from core import neardup
+from core.stages import run_staged
 from dotenv import load_dotenv
 load_dotenv()
 
 log = get_logger("pipeline")
 
-def upsert_source(domain, tag):
-    exec_one("""
-        INSERT INTO sources(domain, reliability_tag, last_seen)
-        VALUES (%s,%s,NOW())
-        ON CONFLICT(domain) DO UPDATE SET
-          reliability_tag=EXCLUDED.reliability_tag,
-          last_seen=NOW()
-    """, (domain, tag))
-    
-def insert_article(a):
-    exec_one("""
-        INSERT INTO articles(title, url, source_domain, summary, content, published_at, is_verified)
-        VALUES (%s,%s,%s,%s,%s,%s,%s)
-        ON CONFLICT (url) DO NOTHING
-    """, (a["title"], a["url"], a["source_domain"], a["summary"], a["content"], a["published_at"], a["is_verified"]))
-    
-    rows = exec_one("SELECT id FROM articles WHERE url=%s", (a["url"],))
-    return rows[0]["id"] if rows else None
-
-def insert_summary(article_id, s):
-    exec_one("""
-        INSERT INTO summaries(article_id, neutral_summary, trust_index, reasoning)
-        VALUES (%s,%s,%s,%s)
-    """, (article_id, s["neutral_summary"], s["trust_index"], s["reasoning"]))
-    
-def insert_analysis(article_id, an):
-    """Insert bias analysis results with computed final score"""
-    exec_one("""
-        INSERT INTO analysis(article_id, bias_label, bias_score, final_score)
-        VALUES (%s,%s,%s,%s)
-    """, (article_id, an["bias_label"], an["bias_score"], an["final_score"]))
-        
 # -------------------------------
 # Pipeline logic
 # -------------------------------
 
-def run(topic: str, limit: int):
-    """Fetch, summarize, analyze, and store articles."""
-    arts = fetch_news(topic=topic, limit=limit)
-    saved = 0
-    
-    for a in arts:
-        upsert_source(a["source_domain"], a["reliability_tag"])
-        article_id = insert_article(a)
-        if not article_id:
-            continue  # Skip duplicates
-
-        # Summarize content
-        s = summarize(a["content"], a["reliability_tag"])
-        insert_summary(article_id, s)
-
-        # Analyze bias and compute final trust score
-        an = analyze_bias(a["content"] or a["summary"])
-        penalty = int(abs(an["bias_score"]) * 30)
-        final_score = max(0, min(100, s["trust_index"] - penalty))
-        an["final_score"] = final_score
-
-        insert_analysis(article_id, an)
-        saved += 1
-        
-    log.info(f"✅ Ingested {saved}/{len(arts)} articles")
-    
+# Bump when final_score() changes; stored rows with another analysis.model_version
+# are re-scored by `python -m core.backfill`
+SCORE_VERSION = "1"
+ANALYSIS_VERSION = f"{ANALYZER_VERSION}+score{SCORE_VERSION}"
+
+def final_score(s, an):
+    """Trust index minus a penalty for strongly one-sided sentiment"""
+    penalty = int(abs(an["bias_score"]) * 30)
+    return max(0, min(100, s["trust_index"] - penalty))
+
+def _succeeded(s, an) -> bool:
+    """False for the summarizer's / analyzer's failure placeholders, which copies must not inherit"""
+    return (s["reasoning"] != FAILED["reasoning"] and bool(s["trust_index"])
+            and an["bias_label"] != UNKNOWN["bias_label"])
+
+def _infer(arts, idx) -> dict:
+    """{index: (summary, analysis)} for arts[i], i in idx"""
+    if not idx:
+        return {}
+    todo = [arts[i] for i in idx]
+    with metrics.timer(stage="summarize"):
+        summaries = summarize_batch(todo)
+    with metrics.timer(stage="analyze"):
+        analyses = analyze_bias_batch([a["content"] or a["summary"] for a in todo])
+    metrics.inc("articles_inferred_total", len(todo))
+    for s, an in zip(summaries, analyses):
+        s["model_version"], an["model_version"] = SUMMARY_VERSION, ANALYSIS_VERSION
+    return dict(zip(idx, zip(summaries, analyses)))
+
+def infer_batch(arts):
+    """
+    Summarize + analyze a batch of articles; returns items ready for persist_batch.
+    Near-duplicates of a stored story (or of an earlier article in the batch)
+    reuse the canonical copy's results instead of running the models, unless
+    inference failed for the canonical; then the copy gets its own run.
+    """
+    links = neardup.match(arts)
+    reused = {cid: r for cid, r in neardup.stored_results({l["cluster_id"] for l in links if l["cluster_id"]}).items()
+              if _succeeded(*r)}
+    fresh = [i for i, l in enumerate(links) if l["index"] is None and l["cluster_id"] not in reused]
+    results = _infer(arts, fresh)
+
+    # In-batch canonicals are only known to have failed after the first pass
+    retry = [i for i, l in enumerate(links) if l["index"] is not None and not _succeeded(*results[l["index"]])]
+    results.update(_infer(arts, retry))
+
+    items = []
+    for i, (a, l) in enumerate(zip(arts, links)):
+        if i in results:
+            s, an = results[i]
+        else:
+            s, an = reused[l["cluster_id"]] if l["index"] is None else results[l["index"]]
+            s, an = for_source(s, a["reliability_tag"]), dict(an)
+            metrics.inc("near_duplicates_total", where="stored" if l["index"] is None else "batch")
+        an["final_score"] = final_score(s, an)
+        items.append({"article": a, "summary": s, "analysis": an, "near_dup": l})
+    return items
+
+def process_batch(arts):
+    """Summarize + analyze a batch of articles and write it in one transaction"""
+    return persist_batch(infer_batch(arts))
+
+def run(topic: str, limit: int, dry_run: bool = False, batch_size: int = BATCH_SIZE,
+        staged: bool = False, extract_workers: int = 4, queue_size: int = 4, url_index=None,
+        incremental: bool = True, resume: bool = False, countries: str = "us,in,gb", progress=None):
+    """
+    Fetch, summarize, analyze, and store articles. Returns the number saved.
+    `progress(fetched, processed, saved)` is called after every page and batch.
+    """
+    if url_index is None and not dry_run:
+        url_index = UrlIndex()
+
+    # Watermarks live in the DB, so dry runs never use them
+    watermark = None
+    if (incremental or resume) and not dry_run:
+        watermark = Watermark(topic, countries, resume=resume)
+
+    if staged and not dry_run:
+        fetched, saved = run_staged(
+            topic, limit, url_index=url_index, process=infer_batch, persist=persist_batch,
+            extract_workers=extract_workers, batch_size=batch_size, queue_size=queue_size,
+            countries=countries, watermark=watermark, progress=progress
+        )
+        log.info(f"✅ Ingested {saved}/{fetched} articles (staged)")
+        log.info(f"Inference cache: {inference_cache.stats()}")
+        log.info(f"Stage timings: {metrics.stage_summary()}")
+        return saved
+
+    # Pages stream in while earlier ones are processed; already-ingested URLs are
+    # dropped inside the crawler, before any network or model work
+    fetched = processed = saved = 0
+    for page in iter_news_pages(topic=topic, limit=limit, countries=countries,
+                                url_index=url_index, watermark=watermark):
+        fetched += len(page)
+        if progress:
+            progress(fetched, processed, saved)
+        if dry_run:
+            # Crawl only: no models are loaded and nothing is written
+            for a in page:
+                log.info(f"[dry-run] {a['source_domain']} | {a['reliability_tag']} | {a['title']}")
+            continue
+        for i in range(0, len(page), batch_size):
+            chunk = page[i:i + batch_size]
+            saved += process_batch(chunk)
+            processed += len(chunk)
+            if progress:
+                progress(fetched, processed, saved)
+
+    if dry_run:
+        log.info(f"[dry-run] Fetched {fetched} articles, skipped summarize/analyze/store")
+        return 0
+
+    log.info(f"✅ Ingested {saved}/{fetched} articles")
+    log.info(f"Inference cache: {inference_cache.stats()}")
+    log.info(f"Stage timings: {metrics.stage_summary()}")
+    return saved
+
 # -------------------------------
 # CLI entry point
 # -------------------------------
 if __name__ == "__main__":
     p = argparse.ArgumentParser()
     p.add_argument("--topic", default="latest", help="Topic to fetch news for")
+    p.add_argument("--topics", help="Comma-separated topics (overrides --topic)")
+    p.add_argument("--topics-file", help="File with one topic per line (# comments allowed)")
+    p.add_argument("--workers", type=int, default=1, help="Processes to shard topics across")
     p.add_argument("--limit", type=int, default=20, help="Number of articles to process")
+    p.add_argument("--dry-run", "--crawl-only", dest="dry_run", action="store_true",
+                   help="Only crawl and print articles; never loads the models or touches the DB")
+    p.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                   help="Articles per inference + DB transaction batch")
+    p.add_argument("--staged", action="store_true",
+                   help="Overlap crawl/filter/extract/inference/persist stages through bounded queues")
+    p.add_argument("--extract-workers", type=int, default=4, help="Firecrawl stage threads (--staged)")
+    p.add_argument("--queue-size", type=int, default=4, help="Max batches waiting between stages (--staged)")
+    p.add_argument("--no-incremental", dest="incremental", action="store_false",
+                   help="Ignore the topic watermark and page until --limit")
+    p.add_argument("--resume", action="store_true",
+                   help="Deep backfill: continue from the saved page token, checkpointing every page")
+    p.add_argument("--metrics-json", default=os.getenv("METRICS_SNAPSHOT"),
+                   help="Write a JSON snapshot of counters/stage timings here at the end of the run")
+    p.add_argument("--metrics-port", type=int, default=None,
+                   help="Serve Prometheus text on :PORT/metrics while the run is going")
+    p.add_argument("--profile", nargs="?", const="data/profiles", default=None, metavar="DIR",
+                   help="Run under cProfile + tracemalloc and write the report to DIR")
     args = p.parse_args()
 
-    run(args.topic, args.limit)
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+
+    opts = dict(dry_run=args.dry_run, batch_size=args.batch_size, staged=args.staged,
+                extract_workers=args.extract_workers, queue_size=args.queue_size,
+                incremental=args.incremental, resume=args.resume)
+
+    def _main():
+        if args.topics or args.topics_file:
+            from core.workers import load_topics, run_many
+            run_many(load_topics(args.topics, args.topics_file), args.limit, workers=args.workers, **opts)
+        else:
+            run(args.topic, args.limit, **opts)
+
+    if args.profile:
+        from core.utils.profiling import profiled
+        with profiled(args.profile):
+            _main()
+    else:
+        _main()
+
+    if args.metrics_json:
+        log.info(f"Metrics snapshot written to {metrics.write_snapshot(args.metrics_json)}")
         
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""
+Per-source aggregates for the Insights / Analysis pages.
+
+source_rollups holds, per source_domain: stored articles, scored articles
+(summary + analysis), trust / final-score sums, a 10-bucket trust_index
+histogram and trust-level counts. persist_batch() applies the deltas for
+each batch inside its own transaction, so the rollups never drift from the
+archive; rebuild() recomputes them from scratch (after a migration, a
+manual cleanup, or a backfill).
+
+    python -m core.rollups --rebuild
+"""
+
+import argparse
+from psycopg2.extras import execute_values
+from core.utils.db_connect import transaction
+from core.utils.logger import get_logger
+
+log = get_logger("rollups")
+
+HIST_BUCKETS = 10           # trust_index 0-9, 10-19, ... 90-100
+UNVERIFIED_TRUST = 60       # below: Low Confidence, equal: Unverified, above: Trusted
+LEVELS = ("low_confidence", "unverified", "trusted")
+
+def bucket(trust_index) -> int:
+    return min(int(trust_index) // 10, HIST_BUCKETS - 1)
+
+def level(trust_index) -> str:
+    if trust_index < UNVERIFIED_TRUST:
+        return "low_confidence"
+    return "unverified" if trust_index == UNVERIFIED_TRUST else "trusted"
+
+def bucket_labels() -> list:
+    return [f"{i * 10}-{i * 10 + 9}" if i < HIST_BUCKETS - 1 else f"{i * 10}-100" for i in range(HIST_BUCKETS)]
+
+def _deltas(items) -> dict:
+    """Per-source increments for newly stored {"article", "summary", "analysis"} items"""
+    out = {}
+    for it in items:
+        d = out.setdefault(it["article"]["source_domain"], {
+            "articles": 0, "scored": 0, "trust_sum": 0.0, "final_sum": 0.0,
+            "hist": [0] * HIST_BUCKETS, **{lv: 0 for lv in LEVELS},
+        })
+        d["articles"] += 1
+        t, f = it["summary"].get("trust_index"), it["analysis"].get("final_score")
+        d["trust_sum"] += t or 0
+        d["final_sum"] += f or 0
+        if t is not None and f is not None:
+            d["scored"] += 1
+            d["hist"][bucket(t)] += 1
+            d[level(t)] += 1
+    return out
+
+def apply(cur, items):
+    """Add newly stored items to the rollups, using the caller's transaction"""
+    deltas = _deltas(items)
+    if not deltas:
+        return
+    execute_values(cur, """
+        INSERT INTO source_rollups AS r
+          (source_domain, articles, scored, trust_sum, final_sum, trust_hist,
+           low_confidence, unverified, trusted, updated_at)
+        VALUES %s
+        ON CONFLICT (source_domain) DO UPDATE SET
+          articles = r.articles + EXCLUDED.articles,
+          scored = r.scored + EXCLUDED.scored,
+          trust_sum = r.trust_sum + EXCLUDED.trust_sum,
+          final_sum = r.final_sum + EXCLUDED.final_sum,
+          trust_hist = ARRAY(
+            SELECT a + b FROM unnest(r.trust_hist, EXCLUDED.trust_hist) WITH ORDINALITY AS u(a, b, i) ORDER BY i
+          ),
+          low_confidence = r.low_confidence + EXCLUDED.low_confidence,
+          unverified = r.unverified + EXCLUDED.unverified,
+          trusted = r.trusted + EXCLUDED.trusted,
+          updated_at = NOW()
+    """, [
+        (src, d["articles"], d["scored"], d["trust_sum"], d["final_sum"], d["hist"],
+         d["low_confidence"], d["unverified"], d["trusted"])
+        for src, d in sorted(deltas.items())  # fixed lock order across concurrent writers
+    ], template="(%s,%s,%s,%s,%s,%s::int[],%s,%s,%s,NOW())", page_size=len(deltas))
+
+def rebuild():
+    """Recompute every rollup from the archive (one transaction; readers see old or new, never half)"""
+    hist = ", ".join(
+        f"COUNT(*) FILTER (WHERE scored AND LEAST(trust_index / 10, {HIST_BUCKETS - 1}) = {i})"
+        for i in range(HIST_BUCKETS)
+    )
+    with transaction() as cur:
+        cur.execute("LOCK TABLE source_rollups IN EXCLUSIVE MODE")  # hold off persist_batch deltas
+        cur.execute("DELETE FROM source_rollups")
+        cur.execute(f"""
+            WITH per_article AS (
+              SELECT a.source_domain, s.trust_index, an.final_score,
+                     (s.trust_index IS NOT NULL AND an.final_score IS NOT NULL) AS scored
+              FROM articles a
+              LEFT JOIN LATERAL (
+                SELECT trust_index FROM summaries WHERE article_id = a.id ORDER BY id LIMIT 1
+              ) s ON TRUE
+              LEFT JOIN LATERAL (
+                SELECT final_score FROM analysis WHERE article_id = a.id ORDER BY id LIMIT 1
+              ) an ON TRUE
+            )
+            INSERT INTO source_rollups
+              (source_domain, articles, scored, trust_sum, final_sum, trust_hist,
+               low_confidence, unverified, trusted, updated_at)
+            SELECT source_domain,
+                   COUNT(*),
+                   COUNT(*) FILTER (WHERE scored),
+                   COALESCE(SUM(trust_index), 0),
+                   COALESCE(SUM(final_score), 0),
+                   ARRAY[{hist}]::int[],
+                   COUNT(*) FILTER (WHERE scored AND trust_index < {UNVERIFIED_TRUST}),
+                   COUNT(*) FILTER (WHERE scored AND trust_index = {UNVERIFIED_TRUST}),
+                   COUNT(*) FILTER (WHERE scored AND trust_index > {UNVERIFIED_TRUST}),
+                   NOW()
+            FROM per_article
+            GROUP BY source_domain
+        """)
+        n = cur.rowcount
+    log.info(f"Rebuilt rollups for {n} sources")
+    return n
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--rebuild", action="store_true", help="Recompute all source rollups from the archive")
+    args = p.parse_args()
+    if args.rebuild:
+        rebuild()
+    else:
+        p.print_help()
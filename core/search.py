@@ -0,0 +1,127 @@
+"""
+Full-text search over stored articles.
+
+articles.search_vector is a weighted tsvector (GIN-indexed):
+    A title · B neutral summary · C description · D content
+It is filled on insert (persistence.persist_batch) and rebuilt
+whenever a neutral summary is (re)written (refresh_vectors). search_articles() takes
+web-style queries ("climate -opinion", "\"rate cut\" or inflation") and ranks
+with ts_rank_cd.
+
+    python -m core.search --reindex        # fill search_vector for existing rows
+    python -m core.search "rate cut"       # quick check from the shell
+"""
+
+import argparse, os, re
+from core.utils.db_connect import exec_one
+from core.utils.logger import get_logger
+
+log = get_logger("search")
+
+TS_CONFIG = os.getenv("SEARCH_TS_CONFIG", "english")
+if not re.fullmatch(r"[a-z_]+", TS_CONFIG):
+    raise ValueError(f"Invalid SEARCH_TS_CONFIG '{TS_CONFIG}'")
+MAX_CONTENT_CHARS = int(os.getenv("SEARCH_MAX_CONTENT_CHARS", "100000"))  # tsvector input stays far below 1MB
+MAX_PAGE = 100
+
+def _weighted(weight: str, expr: str = "%s") -> str:
+    return f"setweight(to_tsvector('{TS_CONFIG}', COALESCE({expr}, '')), '{weight}')"
+
+# Four placeholders: title, neutral summary, description, content
+VECTOR_SQL = " || ".join([_weighted("A"), _weighted("B"), _weighted("C"), _weighted("D", f"left(%s, {MAX_CONTENT_CHARS})")])
+
+_REINDEX_VECTOR = VECTOR_SQL % ("a.title", "s.neutral_summary", "a.summary", "a.content")
+
+def vector_params(article: dict, neutral_summary: str = None) -> tuple:
+    return (article.get("title"), neutral_summary, article.get("summary"), article.get("content"))
+
+def refresh_vectors(cur, ids):
+    """Rebuild search_vector from the current summary for these articles, in the caller's transaction"""
+    cur.execute(f"""
+        UPDATE articles a SET search_vector = {_REINDEX_VECTOR}
+        FROM (
+          SELECT x.id, s.neutral_summary
+          FROM unnest(%s::bigint[]) AS x(id)
+          LEFT JOIN summaries s ON s.article_id = x.id
+        ) s
+        WHERE a.id = s.id
+    """, (list(ids),))
+
+def search_articles(query: str, page: int = 1, per_page: int = 20):
+    """
+    Ranked matches for a web-search style query, best first.
+    Returns (rows, has_more); rows carry a highlighted `snippet`.
+    """
+    query = (query or "").strip()
+    if not query:
+        return [], False
+    per_page = max(1, min(int(per_page), MAX_PAGE))
+    offset = (max(1, int(page)) - 1) * per_page
+
+    rows = exec_one(f"""
+        WITH q AS (SELECT websearch_to_tsquery('{TS_CONFIG}', %s) AS query),
+        hits AS (
+          SELECT a.id, ts_rank_cd(a.search_vector, q.query) AS rank
+          FROM articles a, q
+          WHERE a.search_vector @@ q.query
+          ORDER BY rank DESC, a.id DESC
+          LIMIT %s OFFSET %s
+        )
+        SELECT a.id, a.title, a.url, a.source_domain, a.published_at,
+               s.trust_index, an.bias_label, an.final_score, h.rank,
+               ts_headline('{TS_CONFIG}', COALESCE(s.neutral_summary, a.summary, ''), q.query,
+                           'MaxFragments=2, MaxWords=30, MinWords=10') AS snippet
+        FROM hits h
+        JOIN articles a ON a.id = h.id
+        CROSS JOIN q
+        LEFT JOIN LATERAL (
+          SELECT neutral_summary, trust_index FROM summaries WHERE article_id = a.id ORDER BY id LIMIT 1
+        ) s ON TRUE
+        LEFT JOIN LATERAL (
+          SELECT bias_label, final_score FROM analysis WHERE article_id = a.id ORDER BY id LIMIT 1
+        ) an ON TRUE
+        ORDER BY h.rank DESC, a.id DESC
+    """, (query, per_page + 1, offset)) or []
+
+    return rows[:per_page], len(rows) > per_page
+
+def reindex(batch: int = 5000) -> int:
+    """(Re)build search_vector for rows that don't have one yet, in id-ordered batches"""
+    total, last = 0, 0
+    while True:
+        rows = exec_one(f"""
+            WITH todo AS (
+              SELECT id FROM articles
+              WHERE search_vector IS NULL AND id > %s
+              ORDER BY id LIMIT %s
+            )
+            UPDATE articles a SET search_vector = {_REINDEX_VECTOR}
+            FROM todo
+            LEFT JOIN LATERAL (
+              SELECT neutral_summary FROM summaries WHERE article_id = todo.id ORDER BY id LIMIT 1
+            ) s ON TRUE
+            WHERE a.id = todo.id
+            RETURNING a.id
+        """, (last, batch)) or []
+        if not rows:
+            break
+        total += len(rows)
+        last = max(r["id"] for r in rows)
+        log.info(f"Indexed {total} articles (up to id {last})")
+    return total
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("query", nargs="?", help="Search stored articles")
+    p.add_argument("--reindex", action="store_true", help="Fill search_vector for rows that lack one")
+    p.add_argument("--page", type=int, default=1)
+    args = p.parse_args()
+
+    if args.reindex:
+        log.info(f"✅ Indexed {reindex()} articles")
+    if args.query:
+        hits, more = search_articles(args.query, page=args.page)
+        for h in hits:
+            log.info(f"{h['rank']:.3f} | {h['source_domain']} | {h['title']}")
+        if more:
+            log.info(f"... more on page {args.page + 1}")
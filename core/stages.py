@@ -0,0 +1,232 @@
+"""
+Staged execution of the ingest pipeline:
+
+    crawl -> filter -> extract -> infer (summarize + analyze) -> persist
+
+Each stage runs on its own thread(s) and hands work to the next through a
+bounded queue, so HTTP/DB waits overlap with model inference and a slow stage
+applies backpressure instead of letting everything pile up in memory.
+Inference has a single dedicated worker (torch parallelises internally).
+
+Every article travels with the sequence number of the page it came from, so
+a resumed backfill (--resume) checkpoints a page only after the persist
+stage has committed its last article, and never past a page still in flight.
+"""
+
+import queue, threading
+from collections import OrderedDict
+from agents.crawler_agent import iter_pages, screen_results, fill_missing_content
+from core.utils.logger import get_logger
+
+log = get_logger("stages")
+
+_DONE = object()
+
+class _Stage:
+    """`workers` threads that apply fn to items from inq and forward results to outq"""
+
+    def __init__(self, name, fn, inq, outq, workers=1, stop=None, errors=None):
+        self.name, self.fn, self.inq, self.outq = name, fn, inq, outq
+        self.stop = stop
+        self.errors = errors if errors is not None else []
+        self._left = workers
+        self._lock = threading.Lock()
+        self.threads = [
+            threading.Thread(target=self._loop, name=f"{name}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+
+    def start(self):
+        for t in self.threads:
+            t.start()
+        return self
+
+    def _loop(self):
+        while True:
+            item = self.inq.get()
+            if item is _DONE:
+                self.inq.put(_DONE)  # let sibling workers see it too
+                break
+            if self.stop.is_set():
+                continue  # drain quietly after a failure elsewhere
+            try:
+                out = self.fn(item)
+            except Exception as e:
+                log.error(f"Stage '{self.name}' failed: {e}")
+                self.errors.append(e)
+                self.stop.set()
+                continue
+            if out and self.outq is not None:
+                self.outq.put(out)
+
+        # Last worker out closes the downstream queue
+        with self._lock:
+            self._left -= 1
+            last = self._left == 0
+        if last and self.outq is not None:
+            self.outq.put(_DONE)
+
+class _Pages:
+    """
+    Crawled pages in crawl order with the articles still to be persisted, so the
+    resume token only moves past a page once it and every earlier page are stored
+    """
+
+    def __init__(self, checkpoint):
+        self._pages = OrderedDict()   # seq -> [articles left, token to resume from afterwards]
+        self._lock = threading.Lock()
+        self._checkpoint = checkpoint
+
+    def add(self, seq, n, token):
+        with self._lock:
+            self._pages[seq] = [n, token]
+
+    def done(self, seqs=()):
+        """Count persisted articles and checkpoint the newest fully stored page prefix"""
+        with self._lock:
+            for seq in seqs:
+                self._pages[seq][0] -= 1
+            moved, token = False, None
+            while self._pages:
+                left, tok = next(iter(self._pages.values()))
+                if left > 0:
+                    break
+                self._pages.popitem(last=False)
+                moved, token = True, tok
+            if moved:
+                self._checkpoint(token)  # under the lock, so tokens are saved in crawl order
+
+def run_staged(topic: str, limit: int, url_index=None, process=None, persist=None,
+               extract_workers: int = 4, persist_workers: int = 1,
+               batch_size: int = 16, queue_size: int = 4, countries: str = "us,in,gb", watermark=None,
+               progress=None):
+    """
+    Run the pipeline with overlapping stages. `process(articles) -> items` does
+    summarize + analyze, `persist(items) -> saved` writes a batch.
+    `progress(fetched, processed, saved)` is called as the counts move.
+    Returns (fetched, saved); the first stage failure is re-raised once all threads stopped.
+    """
+    stop = threading.Event()
+    q_filter, q_extract, q_infer, q_persist = (queue.Queue(maxsize=queue_size) for _ in range(4))
+    stop_crawl = threading.Event()  # set once the filter stage has accepted `limit` articles
+    counts = {"fetched": 0, "processed": 0, "saved": 0}
+    counts_lock = threading.Lock()
+    errors = []                     # first entry is re-raised at the end
+    pages = _Pages(watermark.checkpoint if watermark else (lambda token: None))  # checkpoint is a no-op unless resuming
+    crawl_state = {"ok": False, "next_page": None, "seq": 0, "cut": False}
+
+    def _count(**deltas):
+        """Apply deltas; returns the (fetched, processed, saved) snapshot taken under the lock"""
+        with counts_lock:
+            for k, n in deltas.items():
+                counts[k] += n
+            snap = counts["fetched"], counts["processed"], counts["saved"]
+        if progress:
+            progress(*snap)
+        return snap
+
+    def _filter(item):
+        results, page, next_page = item
+        with counts_lock:
+            room = limit - counts["fetched"]
+        if room <= 0:
+            crawl_state["cut"] = True
+            if watermark:
+                watermark.stopped_at(page)  # crawled ahead of the limit; the next run re-reads it
+            return None
+        arts, _ = screen_results(results, url_index, limit=room)
+        snap = _count(fetched=len(arts))
+        cut = snap[0] >= limit
+        if cut:
+            crawl_state["cut"] = True
+            stop_crawl.set()
+            if watermark:
+                watermark.stopped_at(page)
+        # Resume after this page, or from it again if the limit cut it short
+        seq = crawl_state["seq"] = crawl_state["seq"] + 1
+        pages.add(seq, len(arts), page if cut else next_page)
+        if not arts:
+            pages.done()
+            return None
+        return [(seq, a) for a in arts]
+
+    def _extract(tagged):
+        arts = fill_missing_content([a for _, a in tagged])
+        return [(seq, a) for (seq, _), a in zip(tagged, arts)]
+
+    def _persist(batch):
+        seqs, items = batch
+        n = persist(items)
+        _count(processed=len(items), saved=n)
+        pages.done(seqs)
+        return None
+
+    stages = [
+        _Stage("filter", _filter, q_filter, q_extract, stop=stop, errors=errors).start(),
+        _Stage("extract", _extract, q_extract, q_infer, workers=extract_workers, stop=stop, errors=errors).start(),
+        _Stage("persist", _persist, q_persist, None, workers=persist_workers, stop=stop, errors=errors).start(),
+    ]
+
+    def _crawl():
+        page = watermark.start_page if watermark else None  # token each page was requested with
+        try:
+            pages = iter_pages(topic, countries, watermark,
+                               should_stop=lambda: stop.is_set() or stop_crawl.is_set())
+            for results, next_page in pages:
+                crawl_state["next_page"] = next_page
+                q_filter.put((results, page, next_page))  # blocks when filtering falls behind
+                page = next_page
+            crawl_state["ok"] = True
+        except Exception as e:
+            log.error(f"NewsData error: {e}")
+        finally:
+            q_filter.put(_DONE)
+
+    crawler = threading.Thread(target=_crawl, name="crawl", daemon=True)
+    crawler.start()
+
+    # Inference runs on this (dedicated) thread, taking up to batch_size ready articles at a time
+    pending = []
+    done = False
+    while not done:
+        item = q_infer.get()
+        if item is _DONE:
+            done = True
+        else:
+            pending.extend(item)
+            # Top up the batch with whatever else is already waiting, without blocking
+            while len(pending) < batch_size:
+                try:
+                    more = q_infer.get_nowait()
+                except queue.Empty:
+                    break
+                if more is _DONE:
+                    done = True
+                    break
+                pending.extend(more)
+
+        # Run whatever is ready now instead of waiting for a full batch, so inference overlaps the crawl
+        while pending and not stop.is_set():
+            chunk, pending = pending[:batch_size], pending[batch_size:]
+            try:
+                q_persist.put(([seq for seq, _ in chunk], process([a for _, a in chunk])))
+            except Exception as e:
+                log.error(f"Stage 'infer' failed: {e}")
+                errors.append(e)
+                stop.set()
+
+    q_persist.put(_DONE)
+    crawler.join()
+    for st in stages:
+        for t in st.threads:
+            t.join()
+
+    if errors:
+        raise errors[0]
+
+    # Pages overlap here, so the watermark only moves once everything was persisted
+    # (resume checkpoints were already written page by page by the persist stage)
+    if watermark and crawl_state["ok"] and not stop.is_set():
+        watermark.finish(exhausted=not crawl_state["next_page"] and not crawl_state["cut"])
+
+    return counts["fetched"], counts["saved"]
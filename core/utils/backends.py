@@ -0,0 +1,82 @@
+"""
+Selectable CPU inference backends for the agents' transformers pipelines.
+
+    torch-fp32   plain PyTorch (default)
+    torch-int8   PyTorch with dynamic int8 quantization of all Linear layers
+    onnxruntime  ONNX export run through ONNX Runtime (needs `optimum[onnxruntime]`)
+
+Quantized / exported models are written once under MODEL_ARTIFACT_DIR and
+loaded from there on later runs. Whatever the backend, the returned object
+behaves like a transformers pipeline (callable, with .tokenizer and .model).
+"""
+
+import os, pathlib
+from core.utils.logger import get_logger
+
+log = get_logger("backends")
+
+BACKENDS = ("torch-fp32", "torch-int8", "onnxruntime")
+BACKEND = os.getenv("INFERENCE_BACKEND", "torch-fp32")
+ARTIFACT_DIR = pathlib.Path(os.getenv("MODEL_ARTIFACT_DIR", "data/models"))
+
+# pipeline task -> (transformers auto class, optimum ORT class)
+_CLASSES = {
+    "sentiment-analysis": ("AutoModelForSequenceClassification", "ORTModelForSequenceClassification"),
+    "summarization": ("AutoModelForSeq2SeqLM", "ORTModelForSeq2SeqLM"),
+}
+
+def artifact_path(model_name: str, revision: str, backend: str) -> pathlib.Path:
+    return ARTIFACT_DIR / backend / f"{model_name.replace('/', '--')}@{revision}"
+
+def _torch_int8(task, model_name, revision):
+    import torch, transformers
+    from transformers import AutoTokenizer, pipeline
+
+    tok = AutoTokenizer.from_pretrained(model_name, revision=revision)
+    path = artifact_path(model_name, revision, "torch-int8") / "model.pt"
+    if path.exists():
+        model = torch.load(path, weights_only=False)
+    else:
+        auto_cls = getattr(transformers, _CLASSES[task][0])
+        fp32 = auto_cls.from_pretrained(model_name, revision=revision).eval()
+        model = torch.quantization.quantize_dynamic(fp32, {torch.nn.Linear}, dtype=torch.qint8)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        torch.save(model, path)
+        log.info(f"Saved int8 model to {path}")
+    return pipeline(task, model=model.eval(), tokenizer=tok)
+
+def _onnxruntime(task, model_name, revision):
+    try:
+        import optimum.onnxruntime as ort
+        from optimum.pipelines import pipeline
+    except ImportError as e:
+        raise RuntimeError("INFERENCE_BACKEND=onnxruntime needs `pip install optimum[onnxruntime]`") from e
+    from transformers import AutoTokenizer
+
+    ort_cls = getattr(ort, _CLASSES[task][1])
+    path = artifact_path(model_name, revision, "onnxruntime")
+    if (path / "config.json").exists():
+        model = ort_cls.from_pretrained(path)
+        tok = AutoTokenizer.from_pretrained(path)
+    else:
+        model = ort_cls.from_pretrained(model_name, revision=revision, export=True)
+        tok = AutoTokenizer.from_pretrained(model_name, revision=revision)
+        model.save_pretrained(path)
+        tok.save_pretrained(path)
+        log.info(f"Exported ONNX model to {path}")
+    return pipeline(task, model=model, tokenizer=tok, accelerator="ort")
+
+def load_pipeline(task: str, model_name: str, revision: str = "main", backend: str = None):
+    """Build the pipeline for `task` on the selected backend"""
+    backend = backend or BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown INFERENCE_BACKEND '{backend}', expected one of {BACKENDS}")
+    log.info(f"Loading {model_name} ({task}) on {backend}")
+
+    if backend == "torch-int8":
+        return _torch_int8(task, model_name, revision)
+    if backend == "onnxruntime":
+        return _onnxruntime(task, model_name, revision)
+
+    from transformers import pipeline
+    return pipeline(task, model=model_name, revision=revision)
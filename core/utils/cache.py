@@ -0,0 +1,72 @@
+"""
+Small in-process LRU cache with optional TTL and optional SQLite persistence.
+Values must be JSON-serializable when a path is given.
+"""
+
+import json, sqlite3, threading, time, pathlib
+from collections import OrderedDict
+
+class TTLCache:
+    def __init__(self, max_entries: int = 10000, ttl: float = None, path: str = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._mem = OrderedDict()   # key -> (expires_at or None, value)
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS cache (k TEXT PRIMARY KEY, v TEXT, expires REAL)")
+            self._db.commit()
+
+    def _expiry(self):
+        return time.time() + self.ttl if self.ttl else None
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit is not None:
+                expires, value = hit
+                if expires is None or expires > now:
+                    self._mem.move_to_end(key)
+                    return value
+                del self._mem[key]
+
+            if self._db is not None:
+                row = self._db.execute("SELECT v, expires FROM cache WHERE k=?", (key,)).fetchone()
+                if row and (row[1] is None or row[1] > now):
+                    value = json.loads(row[0])
+                    self._remember(key, row[1], value)
+                    return value
+        return default
+
+    def set(self, key, value):
+        self.set_many({key: value})
+
+    def set_many(self, items: dict):
+        """Store several entries with a single disk commit"""
+        expires = self._expiry()
+        with self._lock:
+            for key, value in items.items():
+                self._remember(key, expires, value)
+            if self._db is not None and items:
+                self._db.executemany("INSERT OR REPLACE INTO cache(k, v, expires) VALUES (?,?,?)",
+                                     [(k, json.dumps(v), expires) for k, v in items.items()])
+                self._db.commit()
+
+    def _remember(self, key, expires, value):
+        self._mem[key] = (expires, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+    def purge_expired(self):
+        """Drop expired rows from disk (memory entries expire lazily)"""
+        if self._db is not None:
+            with self._lock:
+                self._db.execute("DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?", (time.time(),))
+                self._db.commit()
+
+    def __len__(self):
+        return len(self._mem)
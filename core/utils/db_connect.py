@@ -1,9 +1,24 @@
-import os, psycopg2
+import os, time, threading, atexit, psycopg2
+from contextlib import contextmanager
+from psycopg2 import extensions
+from psycopg2.pool import ThreadedConnectionPool
 from psycopg2.extras import RealDictCursor      #Normally returns tuple but this returns as a dictionary
 from dotenv import load_dotenv
 load_dotenv()
 
+# Pool sizing and health checks (overridable from .env)
+POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+HEALTH_CHECK_AFTER = float(os.getenv("DB_HEALTH_CHECK_SECS", "30"))  # ping connections idle longer than this
+
+_pool = None
+_pool_pid = None
+_slots = None
+_last_used = {}
+_lock = threading.Lock()
+
 def get_conn():
+    """Open a new, unpooled connection. Prefer connection()/transaction()."""
     return psycopg2.connect(
         host=os.getenv("DB_HOST"),
         port=os.getenv("DB_PORT"),
@@ -12,16 +27,109 @@ def get_conn():
         password=os.getenv("DB_PASSWORD"),
         cursor_factory=RealDictCursor
     )
-    
+
+def get_pool():
+    """Process-wide pool, created on first use (and re-created in forked children)"""
+    global _pool, _pool_pid, _slots
+    if _pool is None or _pool_pid != os.getpid():
+        with _lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = ThreadedConnectionPool(
+                    POOL_MIN, POOL_MAX,
+                    host=os.getenv("DB_HOST"),
+                    port=os.getenv("DB_PORT"),
+                    dbname=os.getenv("DB_NAME"),
+                    user=os.getenv("DB_USER"),
+                    password=os.getenv("DB_PASSWORD"),
+                    cursor_factory=RealDictCursor
+                )
+                # psycopg2's pool raises when exhausted; the semaphore makes callers wait instead
+                _slots = threading.BoundedSemaphore(POOL_MAX)
+                _pool_pid = os.getpid()
+                _last_used.clear()
+    return _pool
+
+def close_pool():
+    global _pool
+    with _lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.closeall()
+        _pool = None
+
+atexit.register(close_pool)
+
+def _healthy(conn) -> bool:
+    """Cheap liveness check, only for connections that sat idle for a while"""
+    if conn.closed:
+        return False
+    last = _last_used.get(id(conn))
+    if last is None or time.monotonic() - last < HEALTH_CHECK_AFTER:  # fresh or recently used
+        return True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except Exception:
+        return False
+
+def _release(pool, conn):
+    broken = bool(conn.closed)
+    if not broken and conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+        try:
+            conn.rollback()  # never hand a half-finished transaction to the next caller
+        except Exception:
+            broken = True
+    if broken:
+        _last_used.pop(id(conn), None)
+    else:
+        _last_used[id(conn)] = time.monotonic()
+    pool.putconn(conn, close=broken)
+
+@contextmanager
+def connection():
+    """Borrow a pooled connection; it goes back to the pool when the block exits"""
+    pool = get_pool()
+    _slots.acquire()
+    try:
+        conn = pool.getconn()
+    except Exception:
+        _slots.release()
+        raise
+    try:
+        for _ in range(POOL_MAX):
+            if _healthy(conn):
+                break
+            # Dead (e.g. server restart); drop it and try the next one
+            _last_used.pop(id(conn), None)
+            dead, conn = conn, None  # no longer ours: `finally` must not put it back a second time
+            pool.putconn(dead, close=True)
+            conn = pool.getconn()
+        yield conn
+    finally:
+        if conn is not None:  # None: getconn() failed after the dead one was returned
+            _release(pool, conn)
+        _slots.release()
+
+@contextmanager
+def transaction():
+    """Cursor inside one transaction: commits on success, rolls back on error"""
+    with connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                yield cur
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
 def exec_many(sql, rows):
-    with get_conn() as conn, conn.cursor() as cur:
+    with transaction() as cur:
         cur.executemany(sql, rows)
-        
+
 def exec_one(sql, params=None):
-    with get_conn() as conn, conn.cursor() as cur:
+    with transaction() as cur:
         cur.execute(sql, params or ())
-        try:
-            return cur.fetchall()
-        except Exception:
-            return None
-        
\ No newline at end of file
+        if cur.description is None:
+            return None  # statement returned no rows (INSERT/UPDATE without RETURNING)
+        return cur.fetchall()
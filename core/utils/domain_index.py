@@ -0,0 +1,106 @@
+"""
+Compiled domain rules: a trie over reversed hostname labels
+(com -> bbc -> edition) with optional path-prefix rules on each node.
+
+A rule for "bbc.com" covers every subdomain (edition.bbc.com, www.bbc.com ...);
+a rule for "sky.com/sports" only covers that path on sky.com and its subdomains.
+The most specific match wins: deeper host first, then longer path.
+Lookups cost O(number of labels), independent of how many rules are loaded,
+and host walks are cached.
+"""
+
+from functools import lru_cache
+from urllib.parse import urlparse
+
+class DomainIndex:
+    def __init__(self, cache_size: int = 100_000):
+        self._root = {}
+        self._size = 0
+        self._walk = lru_cache(maxsize=cache_size)(self._walk_host)
+
+    # ---------------------------------------------
+    # Building
+    # ---------------------------------------------
+    def add(self, rule: str, label: str):
+        """Add "example.com" or "example.com/some/path" with a label like "trusted"/"bad"."""
+        rule = rule.strip().lower()
+        if "://" in rule:
+            rule = rule.split("://", 1)[1]
+        host, _, path = rule.partition("/")
+        host = host.removeprefix("www.").strip(".")
+        if not host:
+            return
+
+        node = self._root
+        for part in reversed(host.split(".")):
+            node = node.setdefault(part, {})
+
+        if path:
+            paths = node.setdefault("/paths", [])
+            prefix = "/" + path.strip("/")
+            paths[:] = [p for p in paths if p[0] != prefix] + [(prefix, label)]
+            paths.sort(key=lambda p: len(p[0]), reverse=True)  # longest prefix first
+        else:
+            node["/label"] = label
+        self._size += 1
+        self._walk.cache_clear()
+
+    def update(self, rules, label: str):
+        for r in rules:
+            self.add(r, label)
+
+    def load(self, path: str, default_label: str = None):
+        """
+        Load rules from a text file. Each line is either "<label> <rule>" or, when
+        default_label is given, just "<rule>". Blank lines and # comments are ignored.
+        """
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if not line:
+                    continue
+                parts = line.split()
+                if len(parts) >= 2:
+                    self.add(parts[1], parts[0].lower())
+                elif default_label:
+                    self.add(parts[0], default_label)
+        return self
+
+    # ---------------------------------------------
+    # Lookup
+    # ---------------------------------------------
+    def _walk_host(self, host: str):
+        """Matching trie nodes for a host, most specific first (cached per host)"""
+        nodes = []
+        node = self._root
+        for part in reversed(host.split(".")):
+            node = node.get(part)
+            if node is None:
+                break
+            if "/label" in node or "/paths" in node:
+                nodes.append((node.get("/label"), tuple(node.get("/paths", ()))))
+        return tuple(reversed(nodes))
+
+    def classify_host(self, host: str, path: str = "") -> str:
+        """Label for host (+ optional path), or None if no rule matches"""
+        host = (host or "").lower().strip(".")
+        if not host:
+            return None
+        path = "/" + path.strip("/") if path else ""
+        for label, paths in self._walk(host):
+            for prefix, plabel in paths:
+                if path == prefix or path.startswith(prefix + "/"):
+                    return plabel
+            if label is not None:
+                return label
+        return None
+
+    def classify(self, url: str) -> str:
+        try:
+            p = urlparse(url if "://" in url else "//" + url)
+            return self.classify_host(p.hostname or "", p.path)
+        except Exception:
+            return None
+
+    def __len__(self):
+        return self._size
@@ -0,0 +1,172 @@
+"""
+Persistent cache of model outputs keyed on normalized content.
+
+Key = sha256(whitespace-normalized text) within a namespace that names the
+model, its revision and the truncation/generation settings, so changing any
+of those never serves stale results. Backed by SQLite with an in-process LRU
+in front; the SQLite file is trimmed to INFERENCE_CACHE_MAX_ROWS by evicting
+the least recently used rows. SQLite errors (locked, full disk, corrupt file)
+are logged and turn into misses / skipped writes; the cache never fails inference.
+"""
+
+import hashlib, json, os, pathlib, sqlite3, threading, time
+from collections import OrderedDict, Counter
+from core.utils import metrics
+from core.utils.logger import get_logger
+
+log = get_logger("inference_cache")
+
+ENABLED = os.getenv("INFERENCE_CACHE", "1") != "0"
+CACHE_PATH = os.getenv("INFERENCE_CACHE_PATH", "data/cache/inference.sqlite")
+MAX_ROWS = int(os.getenv("INFERENCE_CACHE_MAX_ROWS", "200000"))
+MEM_ENTRIES = int(os.getenv("INFERENCE_CACHE_MEM", "5000"))
+
+def content_key(text: str) -> str:
+    normalized = " ".join((text or "").split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+def version(ns: str) -> str:
+    """Short stored label for a namespace: 'model@revision#<hash of all settings>'"""
+    return f"{ns.split('|', 1)[0]}#{hashlib.sha256(ns.encode('utf-8')).hexdigest()[:8]}"
+
+def namespace(model: str, revision: str, **settings) -> str:
+    """Stable namespace string for a model + the settings that affect its output"""
+    extra = ",".join(f"{k}={settings[k]}" for k in sorted(settings))
+    return f"{model}@{revision}|{extra}"
+
+class InferenceCache:
+    def __init__(self, path: str = CACHE_PATH, max_rows: int = MAX_ROWS, mem_entries: int = MEM_ENTRIES):
+        self.max_rows = max_rows
+        self.mem_entries = mem_entries
+        self._mem = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.stats = Counter()
+
+        pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS inference_cache (
+              k TEXT PRIMARY KEY,
+              v TEXT NOT NULL,
+              last_used REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_inference_cache_used ON inference_cache(last_used)")
+        self._db.commit()
+
+    def _remember(self, k, v):
+        self._mem[k] = v
+        self._mem.move_to_end(k)
+        while len(self._mem) > self.mem_entries:
+            self._mem.popitem(last=False)
+
+    def get_many(self, ns: str, texts) -> list:
+        """Cached value per text, or None on a miss"""
+        keys = [f"{ns}|{content_key(t)}" for t in texts]
+        out = [None] * len(keys)
+        with self._lock:
+            disk = []
+            for i, k in enumerate(keys):
+                if k in self._mem:
+                    self._mem.move_to_end(k)
+                    out[i] = self._mem[k]
+                    self.stats["hits"] += 1
+                else:
+                    disk.append(i)
+
+            if disk:
+                wanted = list({keys[i] for i in disk})
+                found = {}
+                try:
+                    for j in range(0, len(wanted), 500):  # stay under SQLite's variable limit
+                        chunk = wanted[j:j + 500]
+                        marks = ",".join("?" * len(chunk))
+                        found.update(self._db.execute(
+                            f"SELECT k, v FROM inference_cache WHERE k IN ({marks})", chunk).fetchall())
+                except sqlite3.Error as e:
+                    log.error(f"Inference cache read failed, treating {len(wanted)} lookups as misses: {e}")
+                    metrics.inc("errors_total", stage="inference_cache")
+                    found = {}
+                if found:
+                    self._touch(found)
+                for i in disk:
+                    v = found.get(keys[i])
+                    if v is None:
+                        self.stats["misses"] += 1
+                        continue
+                    out[i] = json.loads(v)
+                    self._remember(keys[i], out[i])
+                    self.stats["hits"] += 1
+        misses = sum(v is None for v in out)
+        metrics.inc("cache_hits_total", len(out) - misses, cache="inference")
+        metrics.inc("cache_misses_total", misses, cache="inference")
+        return out
+
+    def put_many(self, ns: str, texts, values):
+        now = time.time()
+        rows = []
+        with self._lock:
+            for t, v in zip(texts, values):
+                k = f"{ns}|{content_key(t)}"
+                self._remember(k, v)
+                rows.append((k, json.dumps(v), now))
+            try:
+                self._db.executemany("INSERT OR REPLACE INTO inference_cache(k, v, last_used) VALUES (?,?,?)", rows)
+                self._db.commit()
+                self._writes += len(rows)
+                if self._writes >= 1000:
+                    self._writes = 0
+                    self._evict()
+            except sqlite3.Error as e:
+                self._rollback()
+                log.error(f"Inference cache write of {len(rows)} entries skipped: {e}")
+                metrics.inc("errors_total", stage="inference_cache")
+
+    def _rollback(self):
+        try:
+            self._db.rollback()
+        except sqlite3.Error:
+            pass
+
+    def _touch(self, keys):
+        """Best-effort LRU bookkeeping: a failed update only makes eviction less accurate"""
+        now = time.time()
+        try:
+            self._db.executemany("UPDATE inference_cache SET last_used=? WHERE k=?", [(now, k) for k in keys])
+            self._db.commit()
+        except sqlite3.Error as e:
+            self._rollback()
+            log.warning(f"Inference cache last_used update skipped: {e}")
+
+    def _evict(self):
+        """Trim the table back to max_rows, least recently used first"""
+        n = self._db.execute("SELECT COUNT(*) FROM inference_cache").fetchone()[0]
+        if n > self.max_rows:
+            self._db.execute("""
+                DELETE FROM inference_cache WHERE k IN (
+                  SELECT k FROM inference_cache ORDER BY last_used LIMIT ?
+                )
+            """, (n - self.max_rows,))
+            self._db.commit()
+            self.stats["evictions"] += n - self.max_rows
+
+_cache = None
+_cache_pid = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    """Process-wide cache (None if disabled via INFERENCE_CACHE=0)"""
+    global _cache, _cache_pid
+    if not ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None or _cache_pid != os.getpid():  # SQLite handles must not cross a fork
+            _cache = InferenceCache()
+            _cache_pid = os.getpid()
+        return _cache
+
+def stats() -> dict:
+    """Hit / miss / eviction counters for this process"""
+    return dict(_cache.stats) if _cache is not None else {}
@@ -1,20 +1,173 @@
-import logging, os, sys, pathlib
+"""
+Process-wide logging that stays off the hot path.
 
-LOG_DIR = pathlib.Path("data/logs")
-LOG_DIR.mkdir(parents=True, exist_ok=True)
+Loggers only put records on an in-memory queue (QueueHandler); one
+QueueListener thread per process formats them and does the file/console I/O.
+The file gets one JSON object per line and rotates by size (or by time with
+LOG_ROTATE=time). High-volume DEBUG/INFO messages can be sampled per stage,
+e.g. LOG_SAMPLE="crawler=0.1,firecrawl=0.05" keeps 1 in 10 / 1 in 20; the
+stage is `extra={"stage": ...}` if given, else the logger name. Warnings and
+errors are never sampled. The log directory is created on first use.
+"""
+
+import atexit, copy, json, logging, logging.handlers, os, pathlib, queue, sys, threading
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+LOG_DIR = pathlib.Path(os.getenv("LOG_DIR", ROOT / "data" / "logs"))
+LOG_FILE = os.getenv("LOG_FILE", "app.log")
+LOG_ROTATE = os.getenv("LOG_ROTATE", "size")                       # size | time
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 2**20)))
+LOG_BACKUPS = int(os.getenv("LOG_BACKUPS", "5"))
+LOG_WHEN = os.getenv("LOG_ROTATE_WHEN", "midnight")                 # for LOG_ROTATE=time
+LOG_JSON = os.getenv("LOG_JSON", "1") != "0"                        # JSON lines in the file
+LOG_SAMPLE = os.getenv("LOG_SAMPLE", "")
+
+TEXT_FMT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_STD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        out = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        for k, v in vars(record).items():
+            if k not in _STD_ATTRS:
+                out[k] = v if isinstance(v, (str, int, float, bool, type(None))) else repr(v)
+        if record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, ensure_ascii=False)
+
+def parse_sample(spec: str) -> dict:
+    rates = {}
+    for part in (spec or "").split(","):
+        if "=" in part:
+            k, v = part.split("=", 1)
+            rates[k.strip()] = max(0.0, min(1.0, float(v)))
+    return rates
+
+class SamplingFilter(logging.Filter):
+    """Keep a fixed fraction of sub-WARNING records per stage (deterministic, no RNG)"""
+
+    def __init__(self, rates: dict):
+        super().__init__()
+        self.rates = rates
+        self._acc = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        stage = getattr(record, "stage", record.name)
+        rate = self.rates.get(stage)
+        if rate is None:
+            return True
+        with self._lock:
+            acc = self._acc.get(stage, 0.0) + rate
+            keep = acc >= 1.0
+            self._acc[stage] = acc - 1.0 if keep else acc
+        return keep
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Resolve args / traceback now (they may not pickle or outlive the caller),
+        # but keep the traceback separate so the JSON file gets it as its own field
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class _MakeDirOnOpen:
+    """File handler mixin: the log directory is created when the file is first opened"""
+
+    def _open(self):
+        pathlib.Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+class _SizeRotatingHandler(_MakeDirOnOpen, logging.handlers.RotatingFileHandler):
+    pass
+
+class _TimeRotatingHandler(_MakeDirOnOpen, logging.handlers.TimedRotatingFileHandler):
+    pass
+
+# ---------------------------------------------
+# One queue + listener per process
+# ---------------------------------------------
+_queue_handler = None
+_listener = None
+_sinks = ()
+_pid = None
+_setup_lock = threading.Lock()
+
+def _file_handler():
+    path = LOG_DIR / LOG_FILE
+    if LOG_ROTATE == "time":
+        fh = _TimeRotatingHandler(path, when=LOG_WHEN, backupCount=LOG_BACKUPS,
+                                  encoding="utf-8", utc=True, delay=True)
+    else:
+        fh = _SizeRotatingHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS,
+                                  encoding="utf-8", delay=True)
+    fh.setFormatter(JsonFormatter() if LOG_JSON else logging.Formatter(TEXT_FMT))
+    fh.setLevel(logging.INFO)
+    return fh
+
+def _start_listener(q):
+    global _listener, _pid
+    _listener = logging.handlers.QueueListener(q, *_sinks, respect_handler_level=True)
+    _listener.start()
+    _pid = os.getpid()
+
+def _handler():
+    """The shared QueueHandler, starting this process' listener on first use"""
+    global _queue_handler, _sinks
+    with _setup_lock:
+        if _queue_handler is not None:
+            return _queue_handler
+
+        sh = logging.StreamHandler(sys.stdout)
+        sh.setFormatter(logging.Formatter(TEXT_FMT)); sh.setLevel(logging.DEBUG)
+        _sinks = (_file_handler(), sh)
+
+        q = queue.SimpleQueue()  # unbounded: logging calls never block
+        _queue_handler = _QueueHandler(q)
+        _queue_handler.addFilter(SamplingFilter(parse_sample(LOG_SAMPLE)))
+        _start_listener(q)
+        atexit.register(shutdown)
+        return _queue_handler
+
+def _after_fork():
+    # The listener thread doesn't survive fork(); give the child its own queue + thread
+    global _setup_lock
+    _setup_lock = threading.Lock()
+    if _queue_handler is not None:
+        _queue_handler.queue = queue.SimpleQueue()
+        _start_listener(_queue_handler.queue)
+
+os.register_at_fork(after_in_child=_after_fork)
+
+def shutdown():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None and _pid == os.getpid():
+        _listener.stop()
+        _listener = None
 
 def get_logger(name: str):
     """Sets up a custom, reusable logging system"""
-    logger = logging.getLogger(name)     #Returns an existing logger with given name (if one was already created), or creates a new logger if it doesn’t exist yet
-    if logger.handlers:     #handler decides where your log messages go. If they are already present, just return as it is, don't add new ones
+    logger = logging.getLogger(name)
+    qh = _handler()
+    if qh in logger.handlers:
         return logger
-    logger.setLevel(logging.INFO if os.getenv("APP_ENV")=="prod" else logging.DEBUG)    #decides how much detail we need in logs
-    
-    fmt = logging.Formatter("%(asctime)s | %(levelname)s | %(name)s | %(message)s")     #Defines the log message format
-    fh = logging.FileHandler(LOG_DIR / "app.log", encoding="utf-8")     #Creates a file handler
-    fh.setFormatter(fmt); fh.setLevel(logging.INFO)
-    sh = logging.StreamHandler(sys.stdout)      #Creates a stream handler that prints logs directly to the terminal (stdout)
-    sh.setFormatter(fmt); sh.setLevel(logging.DEBUG)
-    logger.addHandler(fh); logger.addHandler(sh)
-    
+    logger.setLevel(logging.INFO if os.getenv("APP_ENV") == "prod" else logging.DEBUG)
+    logger.addHandler(qh)
+    logger.propagate = False
     return logger
@@ -0,0 +1,201 @@
+"""
+Lightweight in-process metrics: labelled counters and timing histograms.
+
+    with metrics.timer("stage_seconds", stage="crawl"): ...
+    metrics.inc("cache_hits_total", cache="inference")
+
+Everything lives in this process; worker processes hand their numbers back
+with drain() and the parent folds them in with merge(). Export either as
+Prometheus text (prometheus_text(), or serve() for a /metrics endpoint) or
+as a JSON snapshot with p50/p95 estimated from the histogram buckets.
+"""
+
+import json, os, pathlib, threading, time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds in seconds; covers cache lookups up to slow model batches
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+_lock = threading.Lock()
+_counters = {}     # (name, labels) -> value
+_histograms = {}   # (name, labels) -> {"buckets": [...], "sum": s, "count": n}
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def inc(name: str, n: float = 1, **labels):
+    if not n:
+        return
+    k = _key(name, labels)
+    with _lock:
+        _counters[k] = _counters.get(k, 0) + n
+
+def observe(name: str, seconds: float, **labels):
+    k = _key(name, labels)
+    with _lock:
+        h = _histograms.get(k)
+        if h is None:
+            h = _histograms[k] = {"buckets": [0] * (len(BUCKETS) + 1), "sum": 0.0, "count": 0}
+        i = next((i for i, b in enumerate(BUCKETS) if seconds <= b), len(BUCKETS))
+        h["buckets"][i] += 1
+        h["sum"] += seconds
+        h["count"] += 1
+
+@contextmanager
+def timer(name: str = "stage_seconds", **labels):
+    """Time the block into histogram `name` (recorded even if it raises)"""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - t0, **labels)
+
+def retry_hook(call: str):
+    """tenacity before_sleep callback that counts retries of `call`"""
+    def _before_sleep(retry_state):
+        inc("retries_total", call=call)
+    return _before_sleep
+
+# ---------------------------------------------
+# Snapshots / cross-process merging
+# ---------------------------------------------
+def _quantile(buckets, count, q):
+    """Linear interpolation inside the bucket holding the q-th observation (like histogram_quantile)"""
+    if not count:
+        return None
+    rank, seen = q * count, 0
+    for i, n in enumerate(buckets):
+        if seen + n >= rank and n:
+            lo = BUCKETS[i - 1] if i else 0.0
+            hi = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+            return lo + (hi - lo) * (rank - seen) / n
+        seen += n
+    return BUCKETS[-1]
+
+def _label_str(labels):
+    return ",".join(f"{k}={v}" for k, v in labels)
+
+def snapshot() -> dict:
+    """JSON-friendly view: {"counters": {...}, "histograms": {...}} keyed by name{labels}"""
+    with _lock:
+        counters = dict(_counters)
+        hists = {k: {"buckets": list(h["buckets"]), "sum": h["sum"], "count": h["count"]}
+                 for k, h in _histograms.items()}
+    out = {"counters": {}, "histograms": {}}
+    for (name, labels), v in sorted(counters.items()):
+        out["counters"][f"{name}{{{_label_str(labels)}}}"] = v
+    for (name, labels), h in sorted(hists.items()):
+        out["histograms"][f"{name}{{{_label_str(labels)}}}"] = {
+            "count": h["count"],
+            "sum_s": round(h["sum"], 6),
+            "p50_s": _quantile(h["buckets"], h["count"], 0.50),
+            "p95_s": _quantile(h["buckets"], h["count"], 0.95),
+            "buckets": h["buckets"],
+        }
+    return out
+
+def stage_summary(name: str = "stage_seconds") -> str:
+    """One line per stage for logs: 'crawl n=4 p50=0.210s p95=0.480s; ...'"""
+    parts = []
+    for key, h in snapshot()["histograms"].items():
+        if key.startswith(name + "{"):
+            parts.append(f"{key[len(name) + 1:-1]} n={h['count']} p50={h['p50_s']:.3f}s p95={h['p95_s']:.3f}s")
+    return "; ".join(parts)
+
+def _raw():
+    with _lock:
+        return {
+            "counters": [[n, list(map(list, l)), v] for (n, l), v in _counters.items()],
+            "histograms": [[n, list(map(list, l)), h["buckets"], h["sum"], h["count"]] for (n, l), h in _histograms.items()],
+        }
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+def drain() -> dict:
+    """Raw counters/histograms for merge() in another process; resets this one"""
+    raw = _raw()
+    reset()
+    return raw
+
+def merge(raw: dict):
+    """Fold in numbers drained from a worker process"""
+    with _lock:
+        for name, labels, v in raw.get("counters", []):
+            k = (name, tuple(map(tuple, labels)))
+            _counters[k] = _counters.get(k, 0) + v
+        for name, labels, buckets, s, n in raw.get("histograms", []):
+            k = (name, tuple(map(tuple, labels)))
+            h = _histograms.setdefault(k, {"buckets": [0] * (len(BUCKETS) + 1), "sum": 0.0, "count": 0})
+            h["buckets"] = [a + b for a, b in zip(h["buckets"], buckets)]
+            h["sum"] += s
+            h["count"] += n
+
+def write_snapshot(path: str):
+    p = pathlib.Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(json.dumps(snapshot(), indent=2), encoding="utf-8")
+    return p
+
+# ---------------------------------------------
+# Prometheus text exposition
+# ---------------------------------------------
+PREFIX = "truelens_"
+
+def _prom_labels(labels, extra=()):
+    parts = [f'{k}="{v}"' for k, v in (*labels, *extra)]
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def prometheus_text() -> str:
+    with _lock:
+        counters = sorted(_counters.items())
+        hists = sorted((k, dict(h, buckets=list(h["buckets"]))) for k, h in _histograms.items())
+
+    lines, typed = [], set()
+    for (name, labels), v in counters:
+        if name not in typed:
+            lines.append(f"# TYPE {PREFIX}{name} counter")
+            typed.add(name)
+        lines.append(f"{PREFIX}{name}{_prom_labels(labels)} {v}")
+    for (name, labels), h in hists:
+        if name not in typed:
+            lines.append(f"# TYPE {PREFIX}{name} histogram")
+            typed.add(name)
+        cum = 0
+        for b, n in zip((*BUCKETS, "+Inf"), h["buckets"]):
+            cum += n
+            lines.append(f"{PREFIX}{name}_bucket{_prom_labels(labels, [('le', b)])} {cum}")
+        lines.append(f"{PREFIX}{name}_sum{_prom_labels(labels)} {h['sum']}")
+        lines.append(f"{PREFIX}{name}_count{_prom_labels(labels)} {h['count']}")
+    return "\n".join(lines) + "\n"
+
+def serve(port: int = None, host: str = "0.0.0.0"):
+    """Expose /metrics (Prometheus) and /metrics.json on a daemon thread"""
+    port = port or int(os.getenv("METRICS_PORT", "9108"))
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/metrics.json"):
+                body, ctype = json.dumps(snapshot()).encode(), "application/json"
+            elif self.path.startswith("/metrics"):
+                body, ctype = prometheus_text().encode(), "text/plain; version=0.0.4"
+            else:
+                self.send_response(404)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer((host, port), Handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, name="metrics", daemon=True).start()
+    return httpd
@@ -0,0 +1,48 @@
+"""
+Lazy, per-process model registry.
+Agents register a loader for each model; nothing heavy (torch / transformers)
+is imported until the first get() call, and the result is cached for the
+rest of the process.
+"""
+
+import threading, time
+from core.utils.logger import get_logger
+
+log = get_logger("models")
+
+_loaders = {}
+_models = {}
+_lock = threading.Lock()
+
+def register(name: str, loader):
+    """Register a zero-arg loader for a model. Registering again replaces it."""
+    _loaders[name] = loader
+    _models.pop(name, None)
+
+def get(name: str):
+    """Return the model, loading it on first use"""
+    m = _models.get(name)
+    if m is not None:
+        return m
+    with _lock:
+        # Another thread may have finished loading while we waited
+        if name not in _models:
+            if name not in _loaders:
+                raise KeyError(f"No model registered as '{name}'")
+            t0 = time.perf_counter()
+            _models[name] = _loaders[name]()
+            log.info(f"Loaded model '{name}' in {time.perf_counter() - t0:.1f}s")
+        return _models[name]
+
+def is_loaded(name: str) -> bool:
+    return name in _models
+
+def warm(*names):
+    """Load the given models now (all registered ones if none given)"""
+    for name in names or list(_loaders):
+        get(name)
+
+def unload(name: str):
+    """Drop a cached model so the next get() reloads it"""
+    with _lock:
+        _models.pop(name, None)
@@ -0,0 +1,43 @@
+"""
+Wrap a block in cProfile + tracemalloc and write the reports:
+
+    with profiled("data/profiles"):
+        run(...)
+
+Produces <stamp>.prof (load with pstats / snakeviz) and <stamp>.txt with the
+top functions by cumulative time plus the largest allocation sites and peak
+traced memory.
+"""
+
+import cProfile, io, pathlib, pstats, time, tracemalloc
+from contextlib import contextmanager
+from core.utils.logger import get_logger
+
+log = get_logger("profiling")
+
+@contextmanager
+def profiled(out_dir: str = "data/profiles", top: int = 40):
+    out = pathlib.Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+
+    tracemalloc.start(25)
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        yield out
+    finally:
+        prof.disable()
+        snap = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        prof.dump_stats(out / f"{stamp}.prof")
+        buf = io.StringIO()
+        pstats.Stats(prof, stream=buf).sort_stats("cumulative").print_stats(top)
+        buf.write(f"\n--- tracemalloc: current {current / 2**20:.1f} MiB, peak {peak / 2**20:.1f} MiB ---\n")
+        for stat in snap.statistics("lineno")[:top // 2]:
+            buf.write(f"{stat}\n")
+        report = out / f"{stamp}.txt"
+        report.write_text(buf.getvalue(), encoding="utf-8")
+        log.info(f"Profile written to {report} (peak traced memory {peak / 2**20:.1f} MiB)")
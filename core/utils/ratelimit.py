@@ -0,0 +1,46 @@
+"""
+Thread-safe token-bucket rate limiting, one bucket per API host.
+"""
+
+import threading, time
+from urllib.parse import urlparse
+
+class TokenBucket:
+    """Allows `rate` requests/sec on average with bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until `tokens` are available, then take them"""
+        if self.rate <= 0:
+            return  # 0 / negative rate means unlimited
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+def for_host(url_or_host: str, rate: float, capacity: float = 1.0) -> TokenBucket:
+    """Shared bucket for a host; the first caller's rate/capacity win"""
+    host = urlparse(url_or_host).netloc if "://" in url_or_host else url_or_host
+    with _buckets_lock:
+        b = _buckets.get(host)
+        if b is None:
+            b = _buckets[host] = TokenBucket(rate, capacity)
+        return b
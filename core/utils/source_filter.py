@@ -1,6 +1,9 @@
 from urllib.parse import urlparse
 import os, requests
 from core.utils.logger import get_logger
+from core.utils.cache import TTLCache
+from core.utils.domain_index import DomainIndex
+from core.utils import metrics
 
 log = get_logger("source_filter")
 
@@ -51,67 +54,138 @@ BAD = {
 }  # still useful for quick manual rules
 
 SAFE_BROWSING_API_KEY = os.getenv("GOOGLE_SB_API_KEY")
+SAFE_BROWSING_URL = os.getenv("SAFE_BROWSING_URL", "https://safebrowsing.googleapis.com/v4/threatMatches:find")
+SB_MAX_ENTRIES = 500    # threatMatches:find limit per request
+
+# Verdict cache: in-memory LRU, persisted to SQLite when SB_CACHE_PATH is set
+_verdicts = TTLCache(
+    max_entries=int(os.getenv("SB_CACHE_SIZE", "50000")),
+    ttl=float(os.getenv("SB_CACHE_TTL", str(6 * 3600))),
+    path=os.getenv("SB_CACHE_PATH") or None
+)
+
+# Extra rules ("trusted example.com" / "bad example.org" per line), merged with the sets above
+SOURCE_RULES_FILE = os.getenv("SOURCE_RULES_FILE")
+
+_index = None
+
+def rules_index() -> DomainIndex:
+    """Suffix/path index over TRUSTED, BAD and SOURCE_RULES_FILE, built on first use"""
+    global _index
+    if _index is None:
+        idx = DomainIndex()
+        idx.update(TRUSTED, "trusted")
+        idx.update(BAD, "bad")
+        if SOURCE_RULES_FILE:
+            try:
+                idx.load(SOURCE_RULES_FILE)
+            except OSError as e:
+                log.error(f"Could not load source rules from {SOURCE_RULES_FILE}: {e}")
+        log.info(f"Compiled {len(idx)} source rules")
+        _index = idx
+    return _index
+
+def source_rule(url: str) -> str:
+    """Label from our own lists: trusted / bad / None (subdomains and path prefixes included)"""
+    return rules_index().classify(url)
 
 def domain_from_url(url: str) -> str:
     """Extract domain from a URL"""
     try:
-        return urlparse(url).netloc.lower().replace("www.","")
+        return (urlparse(url).hostname or "").removeprefix("www.")
     except Exception:
         return ""
-    
+
+def _cached_verdict(url: str):
+    """True/False if we already know, None otherwise (verdicts are per URL)"""
+    return _verdicts.get("url:" + url)
+
+def check_safe_browsing_batch(urls) -> dict:
+    """
+    Safe Browsing verdicts for many URLs: {url: True if safe}.
+    Cached verdicts are reused; the rest go out in chunks of up to 500 per request.
+    Failed requests (network, 4xx/5xx) fail open for this call and are never cached.
+    """
+    urls = [u for u in dict.fromkeys(urls) if u]
+    out = {}
+    if not SAFE_BROWSING_API_KEY:
+        return {u: True for u in urls}  # if key missing, skip check
+
+    todo = []
+    for u in urls:
+        v = _cached_verdict(u)
+        if v is None:
+            todo.append(u)
+        else:
+            out[u] = v
+    metrics.inc("cache_hits_total", len(out), cache="safe_browsing")
+    metrics.inc("cache_misses_total", len(todo), cache="safe_browsing")
+
+    for i in range(0, len(todo), SB_MAX_ENTRIES):
+        chunk = todo[i:i + SB_MAX_ENTRIES]
+        body = {
+            "client": {"clientId": "TrueLens-app", "clientVersion": "1.0"},
+            "threatInfo": {
+                "threatTypes": ["MALWARE","SOCIAL_ENGINEERING","UNWANTED_SOFTWARE","POTENTIALLY_HARMFUL_APPLICATION"],
+                "platformTypes": ["ANY_PLATFORM"],
+                "threatEntryTypes": ["URL"],
+                "threatEntries": [{"url": u} for u in chunk]
+            }
+        }
+        try:
+            with metrics.timer(stage="safe_browsing"):
+                r = requests.post(SAFE_BROWSING_URL, params={"key": SAFE_BROWSING_API_KEY}, json=body, timeout=10)
+            r.raise_for_status()  # 429 quota / 403 key / 5xx bodies have no "matches" and mean "unknown", not "safe"
+            data = r.json()
+        except Exception as e:
+            log.error(f"Safe Browsing API failed for {len(chunk)} URLs: {e}")
+            metrics.inc("errors_total", stage="safe_browsing")
+            out.update({u: True for u in chunk})  # fail open to avoid blocking everything; not cached
+            continue
+
+        # Google returns a "matches" field only for unsafe URLs
+        flagged = {m.get("threat", {}).get("url") for m in data.get("matches") or []}
+        fresh = {}
+        for u in chunk:
+            safe = u not in flagged
+            out[u] = safe
+            fresh["url:" + u] = safe
+            if not safe:
+                log.warning(f"Unsafe URL flagged by Google Safe Browsing: {u}")
+        _verdicts.set_many(fresh)
+
+    return out
+
 def check_safe_browsing(url: str) -> bool:
     """Return True if URL is considered safe by Google Safe Browsing API"""
     if not SAFE_BROWSING_API_KEY or not url:
         return True  # if key missing, skip check
+    return check_safe_browsing_batch([url]).get(url, True)
     
-    endpoint = "https://safebrowsing.googleapis.com/v4/threatMatches:find"
-    body = {
-        "client": {"clientId": "TrueLens-app", "clientVersion": "1.0"},
-        "threatInfo": {
-            "threatTypes": ["MALWARE","SOCIAL_ENGINEERING","UNWANTED_SOFTWARE","POTENTIALLY_HARMFUL_APPLICATION"],
-            "platformTypes": ["ANY_PLATFORM"],
-            "threatEntryTypes": ["URL"],
-            "threatEntries": [{"url": url}]
-        }
-    }
-    try:
-        r = requests.post(endpoint, params={"key": SAFE_BROWSING_API_KEY}, json=body, timeout=10)
-        data = r.json()
-        
-        # Google returns a "matches" field only if URL is unsafe
-        if data.get("matches"):
-            log.warning(f"Unsafe URL flagged by Google Safe Browsing: {url}")
-            return False
-        return True
-    except Exception as e:
-        log.error(f"Safe Browsing API failed for {url}: {e}")
-        return True  # fail open to avoid blocking everything
-    
-def reliability_tag(url: str) -> str:
-    """Labels a URL’s credibility"""
+def reliability_tag(url: str, safe: bool = None) -> str:
+    """Labels a URL’s credibility. Pass `safe` if the Safe Browsing verdict is already known."""
     d = domain_from_url(url)
     if not d:
         return "unverified"
     
     # 1. Check Google Safe Browsing for malicious URLs
-    safe = check_safe_browsing(url)
+    if safe is None:
+        safe = check_safe_browsing(url)
     if not safe:
         return "bad"
 
     # 2. Then fall back to internal trust rules
-    if d in TRUSTED:
-        return "trusted"
-    if d in BAD:
-        return "bad"
-    return "unverified"
+    return source_rule(url) or "unverified"
 
-def is_source_allowed(url: str) -> bool:
+def is_source_allowed(url: str, safe: bool = None) -> bool:
     """Allow all except explicit BAD or flagged by Safe Browsing"""
     d = domain_from_url(url)
     if not d:
         return False
-    if d in BAD:
+    if source_rule(url) == "bad":
         return False
-    if not check_safe_browsing(url):
+    if safe is None:
+        safe = check_safe_browsing(url)
+    if not safe:
         return False
     return True
\ No newline at end of file
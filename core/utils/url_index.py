@@ -0,0 +1,71 @@
+"""
+Index of article URLs we already have, so the crawler can drop repeats
+before any Safe Browsing / Firecrawl / model work happens.
+
+By default each page of results is checked with a single query against
+articles.url (the UNIQUE index makes that cheap). With preload=True the
+whole column is loaded into memory once at startup and no per-page query
+is needed. Either way, URLs seen during this process are remembered too.
+Pass a multiprocessing Manager dict as `shared` to make claims visible
+across worker processes.
+"""
+
+import os, threading
+from core.utils.db_connect import connection, transaction
+from core.utils.logger import get_logger
+
+log = get_logger("url_index")
+
+PRELOAD = os.getenv("URL_INDEX_PRELOAD", "0") == "1"
+
+class UrlIndex:
+    def __init__(self, preload: bool = PRELOAD, shared=None):
+        self._shared = shared
+        self._seen = set()
+        self._lock = threading.Lock()
+        self._preloaded = False
+        if preload:
+            self.load()
+
+    def load(self):
+        """Load every stored URL into memory (streamed, so memory is just the set)"""
+        with connection() as conn:
+            with conn.cursor(name="url_index_load") as cur:
+                cur.itersize = 10000
+                cur.execute("SELECT url FROM articles")
+                urls = {r["url"] for r in cur}
+            conn.rollback()
+        with self._lock:
+            self._seen |= urls
+            self._preloaded = True
+        log.info(f"Loaded {len(urls)} known URLs")
+
+    def known(self, urls) -> set:
+        """Subset of urls that are already stored (or were seen earlier in this process)"""
+        urls = {u for u in urls if u}
+        with self._lock:
+            hit = urls & self._seen
+        rest = urls - hit
+        if rest and not self._preloaded:
+            with transaction() as cur:
+                cur.execute("SELECT url FROM articles WHERE url = ANY(%s)", (list(rest),))
+                found = {r["url"] for r in cur.fetchall()}
+            self.add(found)
+            hit |= found
+        return hit
+
+    def claim(self, url: str) -> bool:
+        """Mark url as taken by this process. False if it was already seen or claimed elsewhere."""
+        with self._lock:
+            if url in self._seen:
+                return False
+            self._seen.add(url)
+        if self._shared is not None:
+            # setdefault runs atomically in the manager process: first claimant wins
+            pid = os.getpid()
+            return self._shared.setdefault(url, pid) == pid
+        return True
+
+    def add(self, urls):
+        with self._lock:
+            self._seen.update(u for u in urls if u)
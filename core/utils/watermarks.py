@@ -0,0 +1,124 @@
+"""
+Per-topic crawl watermarks stored in crawl_watermarks.
+
+Incremental mode (default): remember the newest pubDate / article_id we
+ingested for a topic, and stop paging once a page reaches that point. The
+watermark only moves when a pass got all the way down to it (or ran out of
+pages); a pass cut short by --limit keeps it and saves the page it stopped
+on as gap_page, where the next incremental run continues.
+Resume mode (deep backfill): start from the saved nextPage token and
+checkpoint the token after every processed page, so a crashed backfill
+picks up where it stopped.
+"""
+
+from datetime import datetime, timezone
+from core.utils.db_connect import exec_one
+from core.utils import metrics
+from core.utils.logger import get_logger
+
+log = get_logger("watermarks")
+
+def _pub_date(a):
+    """NewsData pubDate ("2024-05-01 12:34:56", UTC) as an aware datetime"""
+    s = a.get("pubDate")
+    if not s:
+        return None
+    try:
+        d = datetime.fromisoformat(s.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return d if d.tzinfo else d.replace(tzinfo=timezone.utc)
+
+class Watermark:
+    def __init__(self, topic: str, countries: str, resume: bool = False):
+        self.topic, self.countries, self.resume = topic, countries, resume
+        rows = exec_one("""
+            SELECT last_pub_date, last_article_id, next_page, gap_page
+            FROM crawl_watermarks WHERE topic=%s AND countries=%s
+        """, (topic, countries))
+        row = rows[0] if rows else {}
+        self.last_pub_date = row.get("last_pub_date")
+        self.last_article_id = row.get("last_article_id")
+        self.saved_page = row.get("next_page")
+        self.gap_page = row.get("gap_page")
+        self.newest_pub = None
+        self.newest_id = None
+        self.caught_up = False      # a page reached the stored watermark
+        self.stop_page = None       # set when the limit cut the pass short
+        self._stopped = False
+
+    @property
+    def start_page(self):
+        """Page token to start from: the backfill token when resuming, else an unfinished gap (None = newest)"""
+        return self.saved_page if self.resume else self.gap_page
+
+    def observe(self, results):
+        """Track the newest article seen in this pass"""
+        for a in results:
+            d = _pub_date(a)
+            if d and (self.newest_pub is None or d > self.newest_pub):
+                self.newest_pub, self.newest_id = d, a.get("article_id")
+
+    def reached(self, results) -> bool:
+        """True once a page contains content at or before the stored watermark"""
+        if self.resume or (self.last_pub_date is None and self.last_article_id is None):
+            return False
+        for a in results:
+            d = _pub_date(a)
+            if (self.last_article_id and a.get("article_id") == self.last_article_id) or \
+               (d and self.last_pub_date and d <= self.last_pub_date):
+                self.caught_up = True
+                return True
+        return False
+
+    def stopped_at(self, page):
+        """
+        The pass stopped because of the limit while `page` (the token it was requested
+        with, None for the first page) was not fully processed. First call wins.
+        """
+        if not self._stopped:
+            self._stopped, self.stop_page = True, page
+
+    def checkpoint(self, next_page):
+        """After a page has been fully processed: remember where a resumed backfill continues"""
+        if self.resume:
+            self._save(next_page=next_page or None, keep_page=False)
+
+    def finish(self, exhausted: bool):
+        """
+        End of a successful pass. Incremental passes advance the newest-content
+        watermark only if nothing between it and the new one can have been skipped.
+        """
+        if self.resume:
+            self._save(next_page=None, keep_page=not exhausted)
+        elif self.last_pub_date is None and self.last_article_id is None:
+            self._save(next_page=None, keep_page=True, gap_page=None)   # first pass: nothing older to protect
+        elif not self._stopped and (self.caught_up or exhausted):
+            self._save(next_page=None, keep_page=True, gap_page=None)
+        else:
+            # Cut short before the old watermark: keep it, continue from stop_page next time
+            self._save(next_page=None, keep_page=True, gap_page=self.stop_page, advance=False)
+            log.info(f"'{self.topic}' stopped before its watermark; next run continues the gap")
+            return
+        log.info(f"Watermark for '{self.topic}': {self.newest_pub or self.last_pub_date}")
+
+    def _save(self, next_page, keep_page: bool, gap_page=None, advance: bool = True):
+        # Resume-mode saves never touch the incremental gap
+        keep_gap = self.resume
+        with metrics.timer(stage="db_write", table="crawl_watermarks"):
+            exec_one("""
+                INSERT INTO crawl_watermarks(topic, countries, last_pub_date, last_article_id, next_page, gap_page, updated_at)
+                VALUES (%s,%s,%s,%s,%s,%s,NOW())
+                ON CONFLICT (topic, countries) DO UPDATE SET
+                  last_article_id = CASE
+                    WHEN EXCLUDED.last_pub_date IS NOT NULL
+                     AND (crawl_watermarks.last_pub_date IS NULL OR EXCLUDED.last_pub_date > crawl_watermarks.last_pub_date)
+                    THEN EXCLUDED.last_article_id ELSE crawl_watermarks.last_article_id END,
+                  last_pub_date = GREATEST(crawl_watermarks.last_pub_date, EXCLUDED.last_pub_date),
+                  next_page = CASE WHEN %s THEN crawl_watermarks.next_page ELSE EXCLUDED.next_page END,
+                  gap_page = CASE WHEN %s THEN crawl_watermarks.gap_page ELSE EXCLUDED.gap_page END,
+                  updated_at = NOW()
+            """, (self.topic, self.countries,
+                  None if self.resume or not advance else self.newest_pub,
+                  None if self.resume or not advance else self.newest_id,
+                  next_page, None if keep_gap else gap_page, keep_page, keep_gap))
@@ -0,0 +1,81 @@
+"""
+Multi-topic ingestion across a pool of worker processes.
+Each worker loads both models once, caps its own torch thread count so
+workers don't oversubscribe the CPU, and claims URLs through a dict shared
+by all workers so overlapping topics are processed only once.
+"""
+
+import os, multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from core.utils.logger import get_logger
+from core.utils import metrics
+
+log = get_logger("workers")
+
+_url_index = None
+
+def load_topics(topics: str = None, topics_file: str = None) -> list:
+    """Topics from a comma-separated string and/or a file (one per line), de-duplicated"""
+    out = []
+    if topics:
+        out += [t.strip() for t in topics.split(",")]
+    if topics_file:
+        with open(topics_file, encoding="utf-8") as f:
+            out += [line.split("#", 1)[0].strip() for line in f]
+    return list(dict.fromkeys(t for t in out if t))
+
+def _limit_threads(n: int):
+    # Env vars must be set before torch is imported to affect OpenMP/MKL pools
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(n)
+    try:
+        import torch
+        torch.set_num_threads(n)
+        torch.set_num_interop_threads(1)
+    except Exception as e:
+        log.warning(f"Could not limit torch threads: {e}")
+
+def _init_worker(threads: int, shared, dry_run: bool):
+    global _url_index
+    from core.utils import models
+    from core.utils.url_index import UrlIndex
+    import core.pipeline  # registers the agents' models
+
+    if not dry_run:
+        _limit_threads(threads)
+        models.warm()  # once per worker, reused for every topic it handles
+        _url_index = UrlIndex(shared=shared)
+
+def _run_topic(topic: str, limit: int, opts: dict):
+    from core.pipeline import run
+    saved = run(topic, limit, url_index=_url_index, **opts)
+    return topic, saved, metrics.drain()  # the parent aggregates every worker's numbers
+
+def run_many(topics, limit: int, workers: int = 1, **opts):
+    """Run every topic, sharded across `workers` processes. Returns {topic: saved}."""
+    results = {}
+    if workers <= 1 or len(topics) <= 1:
+        from core.pipeline import run
+        from core.utils.url_index import UrlIndex
+        index = None if opts.get("dry_run") else UrlIndex()  # one index so topics dedup each other
+        for t in topics:
+            results[t] = run(t, limit, url_index=index, **opts)
+    else:
+        workers = min(workers, len(topics))
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        ctx = mp.get_context("spawn")  # no forked torch / DB / SQLite state in the children
+        with ctx.Manager() as manager:
+            shared = manager.dict()
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker,
+                                     initargs=(threads, shared, opts.get("dry_run", False))) as pool:
+                futures = {pool.submit(_run_topic, t, limit, opts): t for t in topics}
+                for f in as_completed(futures):
+                    try:
+                        topic, saved, numbers = f.result()
+                        results[topic] = saved
+                        metrics.merge(numbers)
+                    except Exception as e:
+                        log.error(f"Topic '{futures[f]}' failed: {e}")
+
+    log.info(f"✅ {len(results)}/{len(topics)} topics done, {sum(results.values())} articles saved")
+    return results
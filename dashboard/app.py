@@ -1,4 +1,11 @@
+import sys, pathlib
 import streamlit as st
+
+# Make the project root importable (shared core.utils modules) when run via `streamlit run dashboard/app.py`
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
 from feed import render_feed
 from analysis import render_analysis
 from insights import render_insights
@@ -1,60 +1,125 @@
-import pandas as pd
 import streamlit as st
-import psycopg2, os, time
-from psycopg2.extras import RealDictCursor
+import queries
+from core import jobs
 from dotenv import load_dotenv
 load_dotenv()
 
+def _show_jobs():
+    """One status line per job in this session"""
+    ids = st.session_state.get("job_ids", [])
+    finished = st.session_state.setdefault("jobs_finished", set())
+    rows = jobs.get(ids)
+    finished.update(set(ids) - {j["id"] for j in rows})   # purged from the jobs table: nothing to wait for
+    for j in rows:
+        p = j["params"]
+        label = f"'{p['topic']}' (job #{j['id']})"
+        if j["status"] == "pending":
+            st.info(f"⏳ {label} is queued, waiting for a worker (`python -m core.jobs worker`)")
+        elif j["status"] == "running":
+            st.progress(min(1.0, j["processed"] / max(1, p["limit"])),
+                        text=f"{label}: fetched {j['fetched']} · processed {j['processed']} · saved {j['saved']}")
+        elif j["status"] == "failed":
+            st.error(f"{label} failed: {j['error']}")
+        else:
+            st.success(f"✅ {label}: saved {j['saved']} new articles")
+
+        if j["status"] in ("done", "failed") and j["id"] not in finished:
+            finished.add(j["id"])
+            queries.refresh()
+            st.rerun()  # whole page, so the feed below shows the new articles
+
+_poll_jobs = st.fragment(run_every=2)(_show_jobs)
+
+def render_jobs():
+    """Progress of this session's ingestion jobs; polls every 2s only while one is still pending or running"""
+    ids = st.session_state.get("job_ids", [])
+    if not ids:
+        return
+    finished = st.session_state.get("jobs_finished", set())
+    if any(i not in finished for i in ids):
+        _poll_jobs()
+    else:
+        _show_jobs()   # all done: render once, no timer
+
+def render_search(topic: str) -> bool:
+    """Stored articles matching `topic`, best first. Returns False if nothing matched."""
+    if st.session_state.get("search_query") != topic:
+        st.session_state["search_query"] = topic
+        st.session_state["search_page"] = 1
+    page = st.session_state["search_page"]
 
-def _conn():
-    return psycopg2.connect(
-        host=os.getenv("DB_HOST"),
-        port=os.getenv("DB_PORT"),
-        dbname=os.getenv("DB_NAME"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        cursor_factory=RealDictCursor
-    )
+    df, has_more = queries.search(topic, page)
+    if df.empty and page == 1:
+        st.info(f"Nothing stored matches '{topic}' yet. Fetch & Analyze to crawl it live.")
+        return False
+
+    st.subheader(f"Already stored: '{topic}'")
+    st.dataframe(df.drop(columns=["id", "rank"]), use_container_width=True, hide_index=True,
+                 column_config={"url": st.column_config.LinkColumn("url")})
+    prev_col, page_col, next_col = st.columns([1, 6, 1])
+    if prev_col.button("← Better", key="search_prev", disabled=page == 1):
+        st.session_state["search_page"] = page - 1
+        st.rerun()
+    page_col.caption(f"Results page {page}")
+    if next_col.button("More →", key="search_next", disabled=not has_more):
+        st.session_state["search_page"] = page + 1
+        st.rerun()
+    return True
 
 def render_feed():
     st.header("Live Article Feed")
-    topic = st.text_input("Search topic", value="latest")
+    topic = st.text_input("Search topic", value="latest").strip()
     limit = st.slider("Limit", 10, 100, 30)
 
-    if st.button("Fetch & Analyze"):
-        import subprocess, sys
-        with st.spinner("Fetching and analyzing articles... this may take a moment ⏳"):
-            cmd = [sys.executable, "-m", "core.pipeline", "--topic", topic, "--limit", str(limit)]
-            subprocess.run(cmd, check=False)
-
-        st.success("✅ Pipeline completed. Refreshing feed...")
-        time.sleep(5)  # Give DB time to commit inserts
-        st.rerun()  # Auto-refresh dashboard to show new articles
-
-    # Fetch and display articles from DB
-    with _conn() as c, c.cursor() as cur:
-        cur.execute("""
-            SELECT a.title, a.url, a.source_domain,
-                   s.trust_index, an.bias_label, an.final_score, a.published_at
-            FROM articles a
-            LEFT JOIN summaries s ON s.article_id = a.id
-            LEFT JOIN analysis an ON an.article_id = a.id
-            ORDER BY a.published_at DESC NULLS LAST
-            LIMIT 200
-        """)
-        rows = cur.fetchall()
-
-    if not rows:
-        st.info("No articles yet. Click Fetch & Analyze to start collecting.")
+    # Look in what we already have first; a live crawl costs API quota and model time
+    if topic and topic != "latest":
+        render_search(topic)
+
+    if st.button("Fetch & Analyze", help="Crawl NewsData for this topic and analyze new articles"):
+        # Runs in the job worker (models stay loaded there); identical requests share one job
+        job_id = jobs.enqueue(topic, limit)
+        ids = st.session_state.setdefault("job_ids", [])
+        if job_id not in ids:
+            ids.append(job_id)
+        st.session_state["job_ids"] = ids[-5:]
+
+    render_jobs()
+    render_articles()
+
+RELIABILITY = ["", "trusted", "unverified", "bad"]
+BIAS_LABELS = ["", "negative", "neutral", "positive", "unknown"]
+
+def render_articles():
+    """Filtered feed, one keyset page at a time (Prev/Next walk a stack of cursors)"""
+    c1, c2, c3, c4, c5 = st.columns([3, 2, 2, 3, 1])
+    source = c1.selectbox("Source", [""] + queries.sources(), format_func=lambda s: s or "All sources")
+    reliability = c2.selectbox("Reliability", RELIABILITY, format_func=lambda s: s or "Any")
+    bias = c3.selectbox("Bias", BIAS_LABELS, format_func=lambda s: s or "Any")
+    lo, hi = c4.slider("Final score", 0, 100, (0, 100))
+    page_size = c5.selectbox("Rows", [25, 50, 100, 200], index=1)
+
+    filters = dict(source=source, reliability=reliability, bias_label=bias,
+                   min_score=lo if lo > 0 else None, max_score=hi if hi < 100 else None)
+
+    # New filters start again from the newest article
+    key = (tuple(sorted(filters.items())), page_size)
+    if st.session_state.get("feed_key") != key:
+        st.session_state["feed_key"] = key
+        st.session_state["feed_cursors"] = [None]
+    cursors = st.session_state["feed_cursors"]
+
+    df, next_cursor = queries.feed_page(cursors[-1], page_size, **filters)
+    if df.empty and len(cursors) == 1:
+        st.info("No articles yet. Click Fetch & Analyze to start collecting."
+                if not any(v for v in filters.values()) else "No articles match these filters.")
         return
+    st.dataframe(df.drop(columns=["id"]), use_container_width=True, hide_index=True)
 
-    df = pd.DataFrame(rows)
-    def trust_label(t):
-        if t < 60:
-            return "Low Confidence"
-        elif t == 60:
-            return "Unverified"
-        else:
-            return "Trusted"
-    df["trust_level"] = df["trust_index"].apply(trust_label)
-    st.dataframe(df, use_container_width=True, hide_index=True)
+    prev_col, page_col, next_col = st.columns([1, 6, 1])
+    if prev_col.button("← Newer", key="feed_prev", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    page_col.caption(f"Page {len(cursors)}")
+    if next_col.button("Older →", key="feed_next", disabled=next_cursor is None):
+        cursors.append(next_cursor)
+        st.rerun()
@@ -0,0 +1,132 @@
+"""
+Shared, cached queries for the dashboard pages.
+
+Results are memoized with st.cache_data and keyed on an ingestion watermark
+(the newest article / summary / analysis ids plus the latest summary /
+analysis / rollup write times), so reruns, page switches and widget changes
+reuse the last DataFrame until something is stored or re-scored in place.
+Only the watermark itself is re-read from Postgres, at most every
+DASHBOARD_WATERMARK_TTL seconds (index-only MAX() lookups, and one over the
+small source_rollups table).
+"""
+
+import os
+import numpy as np
+import pandas as pd
+import streamlit as st
+from core.utils.db_connect import exec_one
+from core import feed as feed_api, search as search_api
+from core.rollups import HIST_BUCKETS, UNVERIFIED_TRUST, bucket_labels
+
+CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", "600"))               # upper bound, even without new data
+WATERMARK_TTL = float(os.getenv("DASHBOARD_WATERMARK_TTL", "5"))
+
+TRUST_COLORS = {"Trusted": "#4CAF50", "Unverified": "#FFC107", "Low Confidence": "#F44336"}
+LEVEL_LABELS = {"trusted": "Trusted", "unverified": "Unverified", "low_confidence": "Low Confidence"}
+
+@st.cache_data(ttl=WATERMARK_TTL, show_spinner=False)
+def watermark() -> tuple:
+    """Newest ids and write times; changes whenever ingestion inserts or a backfill upserts"""
+    row = exec_one("""
+        SELECT (SELECT MAX(id) FROM articles)  AS articles,
+               (SELECT MAX(id) FROM summaries) AS summaries,
+               (SELECT MAX(id) FROM analysis)  AS analysis,
+               (SELECT MAX(created_at) FROM summaries) AS summaries_at,   -- upserts set created_at=NOW()
+               (SELECT MAX(created_at) FROM analysis)  AS analysis_at,
+               (SELECT MAX(updated_at) FROM source_rollups) AS rollups_at
+    """)[0]
+    return (row["articles"], row["summaries"], row["analysis"],
+            row["summaries_at"], row["analysis_at"], row["rollups_at"])
+
+def refresh():
+    """Forget the cached watermark so the next read sees just-finished ingestion"""
+    watermark.clear()
+
+def trust_level(trust_index: pd.Series) -> pd.Series:
+    """<60 -> Low Confidence, 60 -> Unverified, otherwise Trusted (vectorized)"""
+    t = pd.to_numeric(trust_index, errors="coerce")
+    return pd.Series(np.select([t < UNVERIFIED_TRUST, t == UNVERIFIED_TRUST], ["Low Confidence", "Unverified"], "Trusted"),
+                     index=trust_index.index)
+
+# ---------------------------------------------
+# Cached queries (the watermark argument is part of the cache key)
+# ---------------------------------------------
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False, max_entries=64)
+def _feed_page(wm, cursor, limit: int, filters: tuple):
+    rows, next_cursor = feed_api.feed_page(cursor=cursor, limit=limit, **dict(filters))
+    df = pd.DataFrame(rows)
+    if not df.empty:
+        df["trust_level"] = trust_level(df["trust_index"])
+    return df, next_cursor
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False, max_entries=64)
+def _search(wm, query: str, page: int, per_page: int):
+    rows, has_more = search_api.search_articles(query, page=page, per_page=per_page)
+    df = pd.DataFrame(rows)
+    if not df.empty:
+        df["trust_level"] = trust_level(df["trust_index"])
+    return df, has_more
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False, max_entries=4)
+def _rollups(wm) -> pd.DataFrame:
+    # O(sources): maintained by persist_batch, see core/rollups.py
+    rows = exec_one("""
+        SELECT source_domain, articles, scored, trust_sum, final_sum, trust_hist,
+               low_confidence, unverified, trusted
+        FROM source_rollups
+        WHERE articles > 0
+    """) or []
+    return pd.DataFrame(rows)
+
+def feed_page(cursor=None, limit: int = 50, **filters):
+    """One keyset page of the feed: (DataFrame, next_cursor). See core.feed.feed_page."""
+    filters = tuple(sorted((k, v) for k, v in filters.items() if v not in (None, "")))
+    return _feed_page(watermark(), cursor, limit, filters)
+
+def search(query: str, page: int = 1, per_page: int = 20):
+    """Ranked full-text matches among stored articles: (DataFrame, has_more)"""
+    return _search(watermark(), query.strip(), page, per_page)
+
+def sources() -> list:
+    """Known source domains (for filter widgets)"""
+    df = rollups()
+    return sorted(df["source_domain"]) if not df.empty else []
+
+def rollups() -> pd.DataFrame:
+    """Per-source aggregates (counts, sums, trust histogram, trust-level counts)"""
+    return _rollups(watermark())
+
+def source_stats(limit: int = 50) -> pd.DataFrame:
+    """Per-source article count and average trust / final score (missing scores count as 0)"""
+    df = rollups()
+    if df.empty:
+        return df
+    out = pd.DataFrame({
+        "source_domain": df["source_domain"],
+        "articles": df["articles"],
+        "avg_trust": df["trust_sum"] / df["articles"],
+        "avg_final": df["final_sum"] / df["articles"],
+    })
+    return out.sort_values("avg_final", ascending=False).head(limit).reset_index(drop=True)
+
+def top_sources(limit: int = 20) -> pd.DataFrame:
+    """Mean final score per source over scored articles, best first"""
+    df = rollups()
+    df = df[df["scored"] > 0] if not df.empty else df
+    if df.empty:
+        return pd.DataFrame(columns=["source_domain", "final_score"])
+    out = pd.DataFrame({"source_domain": df["source_domain"], "final_score": df["final_sum"] / df["scored"]})
+    return out.sort_values("final_score", ascending=False).head(limit).reset_index(drop=True)
+
+def trust_histogram() -> pd.DataFrame:
+    """Scored articles per trust_index bucket, summed over all sources"""
+    df = rollups()
+    counts = np.zeros(HIST_BUCKETS, dtype=int)
+    if not df.empty:
+        counts = np.vstack(df["trust_hist"].to_list()).sum(axis=0)
+    return pd.DataFrame({"trust_index": bucket_labels(), "count": counts})
+
+def trust_levels() -> pd.DataFrame:
+    df = rollups()
+    totals = {label: int(df[col].sum()) if not df.empty else 0 for col, label in LEVEL_LABELS.items()}
+    return pd.DataFrame({"trust_level": list(totals), "count": list(totals.values())})
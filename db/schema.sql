@@ -59,4 +59,132 @@ CREATE TABLE IF NOT EXISTS analysis (
 -- INDEXES FOR PERFORMANCE
 -- ================================
 CREATE INDEX IF NOT EXISTS idx_articles_source ON articles(source_domain);
-CREATE INDEX IF NOT EXISTS idx_articles_published ON articles(published_at);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_articles_published ON articles(published_at);
+
+-- ================================
+-- CRAWL WATERMARKS (incremental crawling / resumable backfills)
+-- ================================
+CREATE TABLE IF NOT EXISTS crawl_watermarks (
+  topic TEXT NOT NULL,
+  countries TEXT NOT NULL,
+  last_pub_date TIMESTAMP WITH TIME ZONE,
+  last_article_id TEXT,
+  next_page TEXT,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  PRIMARY KEY (topic, countries)
+);
+-- Page an incremental pass stopped on before reaching the watermark (the next run continues there)
+ALTER TABLE crawl_watermarks ADD COLUMN IF NOT EXISTS gap_page TEXT;
+
+-- ================================
+-- JOBS (background ingestion requested from the dashboard)
+-- ================================
+CREATE TABLE IF NOT EXISTS jobs (
+  id BIGSERIAL PRIMARY KEY,
+  kind TEXT NOT NULL DEFAULT 'ingest',
+  params JSONB NOT NULL,
+  status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending','running','done','failed')),
+  fetched INT NOT NULL DEFAULT 0,
+  processed INT NOT NULL DEFAULT 0,
+  saved INT NOT NULL DEFAULT 0,
+  error TEXT,
+  worker TEXT,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  started_at TIMESTAMP WITH TIME ZONE,
+  heartbeat_at TIMESTAMP WITH TIME ZONE,
+  finished_at TIMESTAMP WITH TIME ZONE
+);
+
+-- At most one queued/running job per identical request; workers pick the oldest pending one
+CREATE UNIQUE INDEX IF NOT EXISTS uq_jobs_active ON jobs(kind, params) WHERE status IN ('pending','running');
+CREATE INDEX IF NOT EXISTS idx_jobs_pending ON jobs(id) WHERE status = 'pending';
+
+-- ================================
+-- SOURCE ROLLUPS (per-source aggregates, maintained by persist_batch; `python -m core.rollups --rebuild`)
+-- ================================
+CREATE TABLE IF NOT EXISTS source_rollups (
+  source_domain TEXT PRIMARY KEY REFERENCES sources(domain) ON UPDATE CASCADE ON DELETE CASCADE,
+  articles BIGINT NOT NULL DEFAULT 0,            -- stored articles
+  scored BIGINT NOT NULL DEFAULT 0,              -- ... with a summary and an analysis
+  trust_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+  final_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+  trust_hist INT[] NOT NULL DEFAULT array_fill(0, ARRAY[10]),   -- scored articles per trust_index decile
+  low_confidence BIGINT NOT NULL DEFAULT 0,      -- trust_index < 60
+  unverified BIGINT NOT NULL DEFAULT 0,          -- trust_index = 60
+  trusted BIGINT NOT NULL DEFAULT 0,             -- trust_index > 60
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- ================================
+-- FEED (keyset pagination on (COALESCE(published_at,'-infinity'), id), see core/feed.py)
+-- ================================
+CREATE INDEX IF NOT EXISTS idx_articles_feed
+  ON articles ((COALESCE(published_at, '-infinity'::timestamptz)) DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_articles_source_feed
+  ON articles (source_domain, (COALESCE(published_at, '-infinity'::timestamptz)) DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_sources_reliability ON sources(reliability_tag);
+
+-- ================================
+-- FULL-TEXT SEARCH (weighted: A title, B neutral summary, C description, D content; see core/search.py)
+-- ================================
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS search_vector tsvector;
+CREATE INDEX IF NOT EXISTS idx_articles_search ON articles USING GIN (search_vector);
+
+-- ================================
+-- NEAR-DUPLICATES (MinHash + LSH over article content, see core/neardup.py)
+-- ================================
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS cluster_id BIGINT;   -- canonical copy's id (own id for canonicals)
+CREATE INDEX IF NOT EXISTS idx_articles_cluster ON articles(cluster_id);
+
+-- Canonical articles only: 128 x uint32 MinHash signature
+CREATE TABLE IF NOT EXISTS article_signatures (
+  article_id BIGINT PRIMARY KEY REFERENCES articles(id) ON DELETE CASCADE,
+  signature BYTEA NOT NULL
+);
+
+-- One row per LSH band of each canonical; lookups probe (band, bucket)
+CREATE TABLE IF NOT EXISTS article_lsh_bands (
+  band SMALLINT NOT NULL,
+  bucket BIGINT NOT NULL,
+  article_id BIGINT NOT NULL REFERENCES articles(id) ON DELETE CASCADE,
+  PRIMARY KEY (band, bucket, article_id)
+);
+CREATE INDEX IF NOT EXISTS idx_lsh_bands_article ON article_lsh_bands(article_id);
+
+-- ================================
+-- MODEL VERSIONS + BACKFILL (one summary / analysis per article, re-scored by `python -m core.backfill`)
+-- ================================
+ALTER TABLE summaries ADD COLUMN IF NOT EXISTS model_version TEXT;   -- summarizer_agent.MODEL_VERSION
+ALTER TABLE analysis ADD COLUMN IF NOT EXISTS model_version TEXT;    -- pipeline.ANALYSIS_VERSION
+
+-- One-off migration, skipped once the unique indexes exist: older runs could store several
+-- rows per article; keep the first (what every reader already showed)
+DO $$
+BEGIN
+  IF to_regclass('uq_summaries_article') IS NULL THEN
+    DELETE FROM summaries s USING summaries d WHERE s.article_id = d.article_id AND s.id > d.id;
+    CREATE UNIQUE INDEX uq_summaries_article ON summaries(article_id);
+  END IF;
+  IF to_regclass('uq_analysis_article') IS NULL THEN
+    DELETE FROM analysis s USING analysis d WHERE s.article_id = d.article_id AND s.id > d.id;
+    CREATE UNIQUE INDEX uq_analysis_article ON analysis(article_id);
+  END IF;
+END $$;
+
+-- Dashboard watermark: re-scored rows keep their ids, so the write time has to move the cache key
+CREATE INDEX IF NOT EXISTS idx_summaries_created ON summaries(created_at);
+CREATE INDEX IF NOT EXISTS idx_analysis_created ON analysis(created_at);
+DROP INDEX IF EXISTS idx_summaries_article;
+DROP INDEX IF EXISTS idx_analysis_article;
+
+-- Resumable backfill progress: one row per shard (article id % shards) of a named job
+CREATE TABLE IF NOT EXISTS backfill_checkpoints (
+  job TEXT NOT NULL,
+  shards INT NOT NULL,
+  shard INT NOT NULL,
+  last_id BIGINT NOT NULL DEFAULT 0,
+  processed BIGINT NOT NULL DEFAULT 0,
+  done BOOLEAN NOT NULL DEFAULT FALSE,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  PRIMARY KEY (job, shards, shard)
+);
@@ -0,0 +1,60 @@
+"""
+Regression: a --resume pass whose --limit cuts a page short must checkpoint
+that page (not the next one), so the following resume re-reads it and picks
+up the articles the limit left behind.
+"""
+
+from agents import crawler_agent
+from core.utils import watermarks
+
+PAGE_SIZE = 10
+PAGES = {None: ("p1", 0), "p1": ("p2", 1), "p2": (None, 2)}   # request token -> (nextPage, page number)
+
+def _newsdata(params):
+    next_page, n = PAGES[params.get("page")]
+    results = [{"article_id": f"ex{i}", "link": f"https://example.com/ex{i}", "title": f"ex{i}"}
+               for i in range(n * PAGE_SIZE, (n + 1) * PAGE_SIZE)]
+    return {"status": "success", "results": results, "nextPage": next_page}
+
+def _screen(known):
+    def screen(results, url_index=None, limit=None):
+        fresh = [r for r in results if r["link"] not in known]
+        arts = [{"url": r["link"], "title": r["title"]} for r in fresh[:limit]]
+        known.update(a["url"] for a in arts)
+        return arts, len(results) - len(fresh)
+    return screen
+
+def _table(monkeypatch):
+    """crawl_watermarks row kept in memory; only next_page matters in resume mode"""
+    row = {"last_pub_date": None, "last_article_id": None, "next_page": None, "gap_page": None}
+
+    def exec_one(sql, params=None):
+        if sql.lstrip().startswith("SELECT"):
+            return [dict(row)]
+        next_page, keep_page = params[4], params[6]
+        if not keep_page:
+            row["next_page"] = next_page
+        return None
+
+    monkeypatch.setattr(watermarks, "exec_one", exec_one)
+    return row
+
+def test_limit_mid_page_then_resume(monkeypatch):
+    known = set()
+    monkeypatch.setattr(crawler_agent, "NEWSDATA_API_KEY", "test")
+    monkeypatch.setattr(crawler_agent, "_newsdata_request", _newsdata)
+    monkeypatch.setattr(crawler_agent, "screen_results", _screen(known))
+    monkeypatch.setattr(crawler_agent, "fill_missing_content", lambda arts: arts)
+    row = _table(monkeypatch)
+
+    def run(limit):
+        wm = watermarks.Watermark("t", "us", resume=True)
+        return [a["title"] for a in crawler_agent.iter_news("t", limit=limit, countries="us", watermark=wm)]
+
+    first = run(15)
+    assert first == [f"ex{i}" for i in range(15)]
+    assert row["next_page"] == "p1"           # the page the limit cut, not the one after it
+
+    second = run(100)
+    assert second == [f"ex{i}" for i in range(15, 30)]
+    assert row["next_page"] is None           # pages ran out: the backfill is complete